@@ -1,5 +1,21 @@
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
+import contextlib
+import os
+import pickle
+import secrets
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:  # batch hashing falls back to the scalar hash functions
+    np = None
+
+
 class DynamicArrayException(Exception):
     pass
 
@@ -8,7 +24,7 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, pop, swap, get_at_index, set_at_index, length, copy
     """
 
     def __init__(self, arr=None) -> None:
@@ -69,6 +85,79 @@ class DynamicArray:
         """Return length of array."""
         return len(self._data)
 
+    def copy(self) -> "DynamicArray":
+        """Return a shallow copy of the array."""
+        return DynamicArray(self._data)
+
+
+class GenerationArray(DynamicArray):
+    """
+    Dynamic array that reset empties in O(1). Every slot remembers the generation
+    it was last written in and reset starts a new generation; slots written in an
+    older one read as None, and their old values are released once they are
+    written again. The maps use it for their bucket arrays so clear is O(1).
+    """
+
+    def __init__(self, arr=None) -> None:
+        """Initialize new generation array using a list."""
+        super().__init__(arr)
+        self._generation = 0
+        self._written = [0] * len(self._data)
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return str([self[i] for i in range(len(self._data))])
+
+    def append(self, value: object) -> None:
+        """Add new element at the end of the array."""
+        self._data.append(value)
+        self._written.append(self._generation)
+
+    def pop(self):
+        """Remove element from end of the array and return it."""
+        stale = self._written.pop() != self._generation
+        value = self._data.pop()
+        return None if stale else value
+
+    def swap(self, i: int, j: int) -> None:
+        """Swap two elements in array given their indices."""
+        super().swap(i, j)
+        self._written[i], self._written[j] = self._written[j], self._written[i]
+
+    def get_at_index(self, index: int):
+        """Return value of element at a given index, None if it predates the last reset."""
+        if index < 0 or index >= len(self._data):
+            raise DynamicArrayException
+        return self._data[index] if self._written[index] == self._generation else None
+
+    def __getitem__(self, index: int):
+        """Return value of element at a given index using [] syntax."""
+        if index < 0 or index >= len(self._data):
+            raise DynamicArrayException
+        return self._data[index] if self._written[index] == self._generation else None
+
+    def set_at_index(self, index: int, value: object) -> None:
+        """Set value of element at a given index."""
+        if index < 0 or index >= len(self._data):
+            raise DynamicArrayException
+        self._data[index] = value
+        self._written[index] = self._generation
+
+    def __setitem__(self, index: int, value: object) -> None:
+        """Set value of element at a given index using [] syntax."""
+        self.set_at_index(index, value)
+
+    def copy(self) -> "GenerationArray":
+        """Return a shallow copy of the array."""
+        new_array = GenerationArray(self._data)
+        new_array._generation = self._generation
+        new_array._written = self._written.copy()
+        return new_array
+
+    def reset(self) -> None:
+        """Set every element to None in O(1), keeping the length."""
+        self._generation += 1
+
 
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
@@ -88,6 +177,324 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# ---- Seeded hash functions, they take the key and a seed and return 64 bits ---- #
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+FNV_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+
+def fnv1a_hash(key: str, seed: int = 0) -> int:
+    """
+    64-bit FNV-1a over the UTF-8 bytes of the key, with the seed mixed into the
+    offset basis. Every byte changes the state, so anagrams hash differently.
+    """
+    hash = (FNV_OFFSET_BASIS ^ seed) & MASK_64
+    for byte in key.encode('utf-8', 'surrogatepass'):
+        hash = ((hash ^ byte) * FNV_PRIME) & MASK_64
+    return hash
+
+
+def _rotate_left(value: int, bits: int) -> int:
+    """Rotate a 64-bit value left by the given number of bits."""
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+
+def siphash(key: str, seed: int = 0) -> int:
+    """
+    SipHash-2-4 of the UTF-8 bytes of the key. The low and high 64 bits of the
+    seed form the 128-bit secret, so outputs cannot be predicted without it,
+    which protects the maps against inputs crafted to collide.
+    """
+    data = key.encode('utf-8', 'surrogatepass')
+    k0, k1 = seed & MASK_64, (seed >> 64) & MASK_64
+    v0 = k0 ^ 0x736F6D6570736575
+    v1 = k1 ^ 0x646F72616E646F6D
+    v2 = k0 ^ 0x6C7967656E657261
+    v3 = k1 ^ 0x7465646279746573
+
+    def rounds(count: int) -> None:
+        nonlocal v0, v1, v2, v3
+        for _ in range(count):
+            v0 = (v0 + v1) & MASK_64
+            v1 = _rotate_left(v1, 13) ^ v0
+            v0 = _rotate_left(v0, 32)
+            v2 = (v2 + v3) & MASK_64
+            v3 = _rotate_left(v3, 16) ^ v2
+            v0 = (v0 + v3) & MASK_64
+            v3 = _rotate_left(v3, 21) ^ v0
+            v2 = (v2 + v1) & MASK_64
+            v1 = _rotate_left(v1, 17) ^ v2
+            v2 = _rotate_left(v2, 32)
+
+    # full 8-byte words, then the tail with the length in the top byte
+    tail = len(data) - len(data) % 8
+    for i in range(0, tail, 8):
+        word = int.from_bytes(data[i:i + 8], 'little')
+        v3 ^= word
+        rounds(2)
+        v0 ^= word
+    word = int.from_bytes(data[tail:], 'little') | ((len(data) & 0xFF) << 56)
+    v3 ^= word
+    rounds(2)
+    v0 ^= word
+
+    v2 ^= 0xFF
+    rounds(4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+MIX_MULTIPLIER = 0x9E3779B97F4A7C15
+MIX_FINAL_1 = 0xFF51AFD7ED558CCD
+MIX_FINAL_2 = 0xC4CEB9FE1A85EC53
+
+
+def mix_hash(key: str, seed: int = 0) -> int:
+    """
+    Fast multiply-xorshift hash. Consumes the UTF-8 bytes of the key eight at a
+    time and finishes with the MurmurHash3 64-bit finalizer.
+    """
+    data = key.encode('utf-8', 'surrogatepass')
+    hash = (seed ^ (len(data) * MIX_MULTIPLIER)) & MASK_64
+    for i in range(0, len(data), 8):
+        hash = ((hash ^ int.from_bytes(data[i:i + 8], 'little')) * MIX_MULTIPLIER) & MASK_64
+        hash ^= hash >> 29
+    hash ^= hash >> 33
+    hash = (hash * MIX_FINAL_1) & MASK_64
+    hash ^= hash >> 33
+    hash = (hash * MIX_FINAL_2) & MASK_64
+    return hash ^ (hash >> 33)
+
+
+# hash functions that take a seed, the maps give each instance its own
+SEEDED_HASH_FUNCTIONS = (fnv1a_hash, siphash, mix_hash)
+
+
+def bind_seed(function, seed: int = None) -> tuple:
+    """
+    Return (hash function, seed) for a new map. Seeded functions get the given
+    seed, or a random 128-bit one, bound to them; other functions are returned
+    as they are with a seed of None.
+    """
+    if function not in SEEDED_HASH_FUNCTIONS:
+        return function, None
+    if seed is None:
+        seed = secrets.randbits(128)
+    return partial(function, seed=seed), seed
+
+
+def _code_points(keys: list) -> tuple:
+    """
+    Encode keys into one flat int64 buffer of code points.
+    Return the buffer, the offset where each key starts and the length of each key.
+    """
+    data = ''.join(keys).encode('utf-32-le', 'surrogatepass')
+    codes = np.frombuffer(data, dtype='<u4').astype(np.int64)
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    starts = np.zeros(len(keys), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return codes, starts, lengths
+
+
+def _segment_sums(values, starts, lengths):
+    """Return the sum of values over each key's segment of the flat buffer."""
+    totals = np.zeros(values.shape[0] + 1, dtype=np.int64)
+    np.cumsum(values, out=totals[1:])
+    return totals[starts + lengths] - totals[starts]
+
+
+def hash_function_1_batch(keys: list):
+    """
+    Batch version of hash_function_1: return the hash of every key in the list
+    as a NumPy int64 array, identical to calling hash_function_1 on each key.
+    """
+    codes, starts, lengths = _code_points(keys)
+    return _segment_sums(codes, starts, lengths)
+
+
+def hash_function_2_batch(keys: list):
+    """
+    Batch version of hash_function_2: return the hash of every key in the list
+    as a NumPy int64 array, identical to calling hash_function_2 on each key.
+    """
+    codes, starts, lengths = _code_points(keys)
+    # 1-based position of every character within its own key
+    positions = np.arange(1, codes.shape[0] + 1, dtype=np.int64) - np.repeat(starts, lengths)
+    return _segment_sums(codes * positions, starts, lengths)
+
+
+# hash functions that files can name by id, the id is the position in this tuple,
+# so new functions are only ever appended
+HASH_FUNCTIONS = (hash_function_1, hash_function_2, fnv1a_hash, siphash, mix_hash)
+
+
+def hash_function_id(function) -> int:
+    """
+    Return the id of a hash function in HASH_FUNCTIONS. A function bound to a
+    seed by bind_seed has the id of the function it wraps.
+    """
+    function = getattr(function, 'func', function)
+    if function not in HASH_FUNCTIONS:
+        raise ValueError(f"hash function {getattr(function, '__name__', function)!r} has no id")
+    return HASH_FUNCTIONS.index(function)
+
+
+# batch versions of the hash functions above, used by hash_keys
+BATCH_HASH_FUNCTIONS = {
+    hash_function_1: hash_function_1_batch,
+    hash_function_2: hash_function_2_batch,
+}
+
+
+def hash_keys(function, keys: list) -> list:
+    """
+    Return the hash of every key as a list of ints. Uses the batch version of
+    the function when there is one and NumPy is installed, otherwise calls the
+    function once per key.
+    """
+    batch = BATCH_HASH_FUNCTIONS.get(function)
+    if batch is not None and np is not None:
+        return batch(keys).tolist()
+    return [function(key) for key in keys]
+
+
+# binary dumps written by the dump methods of both maps
+DUMP_MAGIC = b'HMAPDUMP'
+DUMP_VERSION = 1
+DUMP_KINDS = ('sc', 'oa')
+
+# magic, version, map kind, power_of_two, hash function id, seed, capacity,
+# number of entries, number of tombstones
+DUMP_HEADER = struct.Struct('<8sIBBxxI16sQQQ')
+
+
+def _open_dump(target, mode: str):
+    """Open a file path, or wrap an open binary file so it is left open."""
+    if isinstance(target, (str, os.PathLike)):
+        return open(target, mode)
+    return contextlib.nullcontext(target)
+
+
+def _write_array(file, typecode: str, values) -> None:
+    """Write values as a little endian array."""
+    data = array(typecode, values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    file.write(data.tobytes())
+
+
+def _read_array(file, typecode: str, count: int) -> array:
+    """Read count values of a little endian array."""
+    data = array(typecode)
+    data.frombytes(file.read(count * data.itemsize))
+    if len(data) != count:
+        raise ValueError("dump is truncated")
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data
+
+
+def write_dump(target, kind: str, function, seed: int, capacity: int, power_of_two: bool,
+               indexes: list, hashes: list, keys: list, values: list,
+               tombstone_indexes: list = (), tombstone_hashes: list = ()) -> None:
+    """
+    Write a map to a file path or binary file: a DUMP_HEADER, the bucket index,
+    stored hash and UTF-8 key length of every entry, the key bytes, the bucket
+    index and hash of every tombstone, and finally the values as one pickle.
+    """
+    encoded = [key.encode('utf-8', 'surrogatepass') for key in keys]
+    with _open_dump(target, 'wb') as file:
+        file.write(DUMP_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, DUMP_KINDS.index(kind), power_of_two,
+                                    hash_function_id(function), (seed or 0).to_bytes(16, 'little'),
+                                    capacity, len(keys), len(tombstone_indexes)))
+        _write_array(file, 'Q', indexes)
+        _write_array(file, 'Q', hashes)
+        _write_array(file, 'I', map(len, encoded))
+        file.write(b''.join(encoded))
+        _write_array(file, 'Q', tombstone_indexes)
+        _write_array(file, 'Q', tombstone_hashes)
+        pickle.dump(values, file, pickle.HIGHEST_PROTOCOL)
+
+
+def read_dump(source, kind: str) -> dict:
+    """
+    Read a dump written by write_dump for a map of the given kind.
+    Return a dict with keys function (unseeded), seed, capacity, power_of_two,
+    indexes, hashes, keys, values, tombstone_indexes and tombstone_hashes.
+    """
+    with _open_dump(source, 'rb') as file:
+        header = file.read(DUMP_HEADER.size)
+        if len(header) != DUMP_HEADER.size or header[:len(DUMP_MAGIC)] != DUMP_MAGIC:
+            raise ValueError("not a hashmap dump")
+        _, version, kind_id, power_of_two, function_id, seed, capacity, count, tombstones = \
+            DUMP_HEADER.unpack(header)
+        if version != DUMP_VERSION:
+            raise ValueError(f"dump has format version {version}, expected {DUMP_VERSION}")
+        if DUMP_KINDS[kind_id] != kind:
+            raise ValueError(f"dump holds a map of kind {DUMP_KINDS[kind_id]!r}, not {kind!r}")
+
+        indexes = _read_array(file, 'Q', count)
+        hashes = _read_array(file, 'Q', count)
+        lengths = _read_array(file, 'I', count)
+        data = file.read(sum(lengths))
+        if len(data) != sum(lengths):
+            raise ValueError("dump is truncated")
+        keys = []
+        start = 0
+        for length in lengths:
+            keys.append(str(data[start:start + length], 'utf-8', 'surrogatepass'))
+            start += length
+        tombstone_indexes = _read_array(file, 'Q', tombstones)
+        tombstone_hashes = _read_array(file, 'Q', tombstones)
+        values = pickle.load(file)
+
+    return {'function': HASH_FUNCTIONS[function_id],
+            'seed': int.from_bytes(seed, 'little'),
+            'capacity': capacity,
+            'power_of_two': bool(power_of_two),
+            'indexes': indexes,
+            'hashes': hashes,
+            'keys': keys,
+            'values': values,
+            'tombstone_indexes': tombstone_indexes,
+            'tombstone_hashes': tombstone_hashes}
+
+
+def dump_options(dump: dict, options: dict) -> dict:
+    """
+    Return the keyword arguments for the map constructor that rebuilds a dump read
+    by read_dump: options plus the power_of_two and seed stored in the dump. The
+    buckets and hashes in the dump only fit that layout, so an option that asks
+    for another one raises ValueError. Functions without a seed ignore it.
+    """
+    for name in ('power_of_two', 'seed'):
+        if name == 'seed' and dump['function'] not in SEEDED_HASH_FUNCTIONS:
+            continue
+        if name in options and options[name] != dump[name]:
+            raise ValueError(f"dump was written with {name}={dump[name]!r}, "
+                             f"cannot load it with {name}={options[name]!r}")
+    return {**options, 'power_of_two': dump['power_of_two'], 'seed': dump['seed']}
+
+
+# multiplier for Fibonacci hashing, 2**64 divided by the golden ratio
+FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def next_power_of_two(capacity: int) -> int:
+    """Return the smallest power of two that is at least capacity"""
+    return 1 << max(capacity - 1, 0).bit_length()
+
+
+def power_of_two_index(hash_value: int, capacity: int) -> int:
+    """
+    Map a hash to a bucket of a table whose capacity is a power of two.
+    The hash is multiplied by the Fibonacci constant and the top bits of the
+    64-bit product are used, so hashes with weak low bits still spread out.
+    """
+    return ((hash_value * FIBONACCI_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (65 - capacity.bit_length())
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -95,11 +502,17 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash_value: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        hash_value is the full hash of the key, kept so the node can be
+        rehashed and compared without calling the hash function again.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash_value = hash_value
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -133,7 +546,7 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, push, remove, pop, contains, access, length, iterator
     """
 
     def __init__(self) -> None:
@@ -160,53 +573,205 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash_value: int = None) -> SLNode:
+        """Insert new node at front of the list and return it."""
+        self._head = SLNode(key, value, self._head, hash_value)
+        self._size += 1
+        return self._head
+
+    def push(self, node: SLNode) -> None:
+        """Link an existing node in at the front of the list."""
+        node.next = self._head
+        self._head = node
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash_value: int = None) -> bool:
         """
         Remove first node with matching key.
+        If hash_value is given, nodes with a different stored hash are skipped without comparing keys.
         Return True if removal was successful, False otherwise.
         """
+        return self.pop(key, hash_value) is not None
+
+    def pop(self, key: str, hash_value: int = None) -> SLNode:
+        """
+        Unlink first node with matching key in a single pass and return it, or None if no match.
+        If hash_value is given, nodes with a different stored hash are skipped without comparing keys.
+        """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash_value is None or node.hash_value == hash_value) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
-                return True
+                return node
 
             previous, node = node, node.next
-        return False
+        return None
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash_value: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash_value is given, nodes with a different stored hash are skipped without comparing keys.
+        """
         node = self._head
+        if hash_value is None:
+            while node:
+                if node.key == key:
+                    return node
+                node = node.next
+            return node
+
         while node:
-            if node.key == key:
+            if node.hash_value == hash_value and node.key == key:
                 return node
             node = node.next
         return node
 
+    def access(self, key: str, hash_value: int = None, policy: str = None) -> SLNode:
+        """
+        Return node with matching key like contains, and reorganize the list on a hit
+        so frequently read keys drift towards the head: 'move_to_front' moves the node
+        to the head, 'transpose' swaps it with the node before it, None leaves the list as is.
+        """
+        if policy is None:
+            return self.contains(key, hash_value)
+
+        before, previous, node = None, None, self._head
+        while node:
+            if (hash_value is None or node.hash_value == hash_value) and node.key == key:
+                if previous is None:
+                    return node
+                previous.next = node.next
+                if policy == 'move_to_front':
+                    node.next = self._head
+                    self._head = node
+                else:
+                    node.next = previous
+                    if before:
+                        before.next = node
+                    else:
+                        self._head = node
+                return node
+            before, previous, node = previous, node, node.next
+        return None
+
     def length(self) -> int:
         """Return the length of the list."""
         return self._size
 
 
+# reorganizations LinkedList.access can apply to a chain on every hit
+BUCKET_POLICIES = ('move_to_front', 'transpose')
+
+# chains longer than this are turned into a SortedBucket, and back into a
+# LinkedList once they shrink below UNTREEIFY_THRESHOLD
+TREEIFY_THRESHOLD = 8
+UNTREEIFY_THRESHOLD = 6
+
+
+class SortedBucket:
+    """
+    Bucket for long chains: nodes are kept in an array sorted by (hash, key) so
+    a lookup is a binary search instead of a walk down the list. Keys in one
+    bucket must be comparable with each other.
+    Supported methods are the same as LinkedList: insert, remove, pop, contains, access, length, iterator
+    """
+
+    def __init__(self, nodes=()) -> None:
+        """
+        Initialize the bucket from an iterable of SLNodes, e.g. a LinkedList.
+        Every node must carry its hash_value.
+        """
+        self._nodes = sorted(nodes, key=lambda node: (node.hash_value, node.key))
+        self._order = [(node.hash_value, node.key) for node in self._nodes]
+        for node in self._nodes:
+            node.next = None
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'SB [' + ' -> '.join(str(node) for node in self._nodes) + ']'
+
+    def __iter__(self):
+        """Return an iterator over the nodes in (hash, key) order."""
+        return iter(self._nodes)
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """Return the index of the node with key, or -1."""
+        order = (hash_value, key)
+        index = bisect_left(self._order, order)
+        if index < len(self._order) and self._order[index] == order:
+            return index
+        return -1
+
+    def insert(self, key: str, value: object, hash_value: int = None) -> SLNode:
+        """Insert new node at its sorted position and return it. The key must not be in the bucket yet."""
+        order = (hash_value, key)
+        index = bisect_left(self._order, order)
+        node = SLNode(key, value, None, hash_value)
+        self._order.insert(index, order)
+        self._nodes.insert(index, node)
+        return node
+
+    def push(self, node: SLNode) -> None:
+        """Link an existing node in at its sorted position. Its key must not be in the bucket yet."""
+        order = (node.hash_value, node.key)
+        index = bisect_left(self._order, order)
+        node.next = None
+        self._order.insert(index, order)
+        self._nodes.insert(index, node)
+
+    def remove(self, key: str, hash_value: int = None) -> bool:
+        """
+        Remove node with matching key and hash.
+        Return True if removal was successful, False otherwise.
+        """
+        return self.pop(key, hash_value) is not None
+
+    def pop(self, key: str, hash_value: int = None) -> SLNode:
+        """Remove node with matching key and hash and return it, or None if no match."""
+        index = self._find(key, hash_value)
+        if index < 0:
+            return None
+        del self._order[index]
+        return self._nodes.pop(index)
+
+    def contains(self, key: str, hash_value: int = None) -> SLNode:
+        """Return node with matching key and hash, or None if no match."""
+        index = self._find(key, hash_value)
+        return self._nodes[index] if index >= 0 else None
+
+    def access(self, key: str, hash_value: int = None, policy: str = None) -> SLNode:
+        """Same as contains, the sorted order does not depend on access so policy is ignored."""
+        return self.contains(key, hash_value)
+
+    def length(self) -> int:
+        """Return the number of nodes in the bucket."""
+        return len(self._nodes)
+
+    def to_list(self) -> LinkedList:
+        """Return a LinkedList holding the same keys, values and hashes."""
+        chain = LinkedList()
+        for node in reversed(self._nodes):
+            chain.insert(node.key, node.value, node.hash_value)
+        return chain
+
+
 # ---------- For use in Open Addressing (OA) HashMap  ---------- #
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
+    def __init__(self, key: str, value: object, hash_value: int = None) -> None:
         """Initialize an entry for use in a hash map."""
         self.key = key
         self.value = value
 
+        # full hash of the key, reused when rehashing and to skip key compares
+        self.hash_value = hash_value
+
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
 
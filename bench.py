@@ -0,0 +1,955 @@
+# Description: Benchmarks for the separate chaining and open addressing hashmaps.
+#
+# Run every benchmark with `python bench.py`, or a single one with
+# `python bench.py <name> [--size N]`.
+
+import argparse
+import asyncio
+import concurrent.futures
+import gc
+import itertools
+import multiprocessing
+import os
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import hash_map_async
+import hash_map_concurrent
+import hash_map_mmap
+import hash_map_oa
+import hash_map_sc
+import heavy_hitters
+from a6_include import (BATCH_HASH_FUNCTIONS, SortedBucket, bind_seed,
+                        fnv1a_hash, hash_function_1, hash_function_2, mix_hash,
+                        np, siphash)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    """
+    Return the value below which the given fraction of samples fall.
+
+    :param samples: sorted list of numbers
+    :param fraction: (float) between 0 and 1
+
+    :return: sample at that rank
+    """
+    index = min(len(samples) - 1, int(fraction * len(samples)))
+    return samples[index]
+
+
+def put_latencies(m, keys: list) -> list:
+    """
+    Put every key into the map and return the sorted latency of each put in microseconds.
+    The garbage collector is paused so its collections do not show up as resize pauses.
+    """
+    latencies = []
+    clock = time.perf_counter_ns
+    gc.collect()
+    gc.disable()
+    try:
+        for i, key in enumerate(keys):
+            start = clock()
+            m.put(key, i)
+            latencies.append((clock() - start) / 1000)
+    finally:
+        gc.enable()
+    latencies.sort()
+    return latencies
+
+
+def bench_incremental_resize(size: int) -> None:
+    """
+    Compare put latency of the open addressing map with one-shot and incremental resizing.
+    Uses the built-in hash so probe lengths do not dominate the measurement.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+    print(f"{'mode':<12} {'p50 us':>8} {'p99 us':>8} {'p99.9 us':>9} {'p99.99 us':>10} {'max us':>10} {'total s':>8}")
+    for mode, incremental in (('one-shot', False), ('incremental', True)):
+        m = hash_map_oa.HashMap(11, hash, incremental_resize=incremental)
+        latencies = put_latencies(m, keys)
+        print(f"{mode:<12} {percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f} "
+              f"{percentile(latencies, 0.999):>9.2f} {percentile(latencies, 0.9999):>10.2f} {latencies[-1]:>10.0f} {sum(latencies) / 1e6:>8.2f}")
+
+
+def bench_resize_long_keys(size: int) -> None:
+    """
+    Time resize_table on maps of long string keys. Resizes reuse the stored hashes,
+    so the hash function is never called; the time it would take to rehash every key
+    is shown for comparison.
+    """
+    rng = random.Random(0)
+    keys = [''.join(rng.choices(string.ascii_letters, k=1000)) for _ in range(size // 100)]
+
+    calls = 0
+
+    def counting_hash(key: str) -> int:
+        nonlocal calls
+        calls += 1
+        return hash_function_2(key)
+
+    start = time.perf_counter()
+    for key in keys:
+        hash_function_2(key)
+    rehash_cost = time.perf_counter() - start
+
+    print(f"{len(keys)} keys of 1000 characters, hashing them all takes {rehash_cost * 1000:.1f} ms")
+    print(f"{'map':<6} {'resize ms':>10} {'hash calls':>11}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        m = module.HashMap(len(keys) * 4, counting_hash)
+        for i, key in enumerate(keys):
+            m.put(key, i)
+        calls = 0
+        start = time.perf_counter()
+        m.resize_table(m.get_capacity() * 2)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<6} {elapsed * 1000:>10.1f} {calls:>11}")
+
+
+def bench_session_churn(size: int) -> None:
+    """
+    Delete-heavy workload on the open addressing map: a fixed number of live sessions
+    where every new session evicts the oldest one, followed by lookups of expired
+    sessions, which have to probe past any tombstones.
+    """
+    live = max(size // 10, 1)
+    print(f"{'tombstone ratio':<16} {'churn ops/s':>12} {'miss ops/s':>11} {'tombstones':>11} {'capacity':>9}")
+    for ratio in (0.05, 0.25, 1.0):
+        m = hash_map_oa.HashMap(11, hash, tombstone_ratio=ratio)
+        for i in range(live):
+            m.put('session' + str(i), i)
+        start = time.perf_counter()
+        for i in range(live, live + size):
+            m.put('session' + str(i), i)
+            m.remove('session' + str(i - live))
+        churn = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(size):
+            m.get('session' + str(i))
+        miss = time.perf_counter() - start
+        print(f"{ratio:<16} {size * 2 / churn:>12.0f} {size / miss:>11.0f} "
+              f"{m.get_tombstone_count():>11} {m.get_capacity():>9}")
+
+
+def bench_compact_storage(size: int) -> None:
+    """
+    Memory per entry of the open addressing map with one HashEntry per bucket and with
+    the parallel-array CompactHashMap, excluding the keys and values themselves.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+    print(f"{'layout':<10} {'bytes/entry':>12} {'put s':>7} {'get s':>7}")
+    for name, cls in (('HashEntry', hash_map_oa.HashMap), ('compact', hash_map_oa.CompactHashMap)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        m = cls(11, hash)
+        for key in keys:
+            m.put(key, key)
+        put_time = time.perf_counter() - start
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        get_time = time.perf_counter() - start
+        print(f"{name:<10} {used / size:>12.1f} {put_time:>7.2f} {get_time:>7.2f}")
+        del m
+
+
+def bench_robin_hood(size: int) -> None:
+    """
+    Compare the quadratic probing map at its 0.5 load limit with Robin Hood hashing
+    at higher loads: table capacity, traced memory and hit/miss lookup throughput.
+    Several sizes are used since both maps double, so capacities only differ once
+    the lower load limit forces the quadratic map into an extra doubling.
+    """
+    maps = (('quadratic 0.5', lambda: hash_map_oa.HashMap(11, hash)),
+            ('robin hood 0.8', lambda: hash_map_oa.RobinHoodHashMap(11, hash, load_factor=0.8)),
+            ('robin hood 0.9', lambda: hash_map_oa.RobinHoodHashMap(11, hash, load_factor=0.9)))
+    print(f"{'size':>8} {'map':<16} {'capacity':>9} {'bytes/entry':>12} {'hit ops/s':>10} {'miss ops/s':>11}")
+    for n in (size // 2, size * 3 // 4, size):
+        keys = ['key' + str(i) for i in range(n)]
+        misses = ['miss' + str(i) for i in range(n)]
+        for name, make in maps:
+            tracemalloc.start()
+            m = make()
+            for key in keys:
+                m.put(key, key)
+            used = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            hit = time.perf_counter() - start
+            start = time.perf_counter()
+            for key in misses:
+                m.get(key)
+            miss = time.perf_counter() - start
+            print(f"{n:>8} {name:<16} {m.get_capacity():>9} {used / n:>12.1f} {n / hit:>10.0f} {n / miss:>11.0f}")
+            del m
+
+
+def bench_power_of_two(size: int) -> None:
+    """
+    Compare prime capacities (modulo indexing, quadratic probing) with power of two
+    capacities (masked Fibonacci hashing, triangular probing) on both maps.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+    print(f"{'map':<4} {'capacity':<14} {'put ops/s':>10} {'get ops/s':>10} {'resize ms':>10}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        for policy, power_of_two in (('prime', False), ('power of two', True)):
+            m = module.HashMap(11, hash, power_of_two=power_of_two)
+            start = time.perf_counter()
+            for key in keys:
+                m.put(key, key)
+            put = time.perf_counter() - start
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            get = time.perf_counter() - start
+            start = time.perf_counter()
+            m.resize_table(m.get_capacity() * 2)
+            resize = time.perf_counter() - start
+            print(f"{name:<4} {policy:<14} {size / put:>10.0f} {size / get:>10.0f} {resize * 1000:>10.1f}")
+
+
+def bench_batch_hashing(size: int) -> None:
+    """
+    Hash a list of keys with the scalar hash functions and with their NumPy batch
+    versions, checking that both give the same codes.
+    """
+    if np is None:
+        print("NumPy is not installed, batch hashing falls back to the scalar functions")
+        return
+    keys = ['key' + str(i) for i in range(size)]
+    print(f"{'function':<16} {'scalar s':>9} {'batch s':>8} {'speedup':>8}")
+    for function in (hash_function_1, hash_function_2):
+        start = time.perf_counter()
+        scalar = [function(key) for key in keys]
+        scalar_time = time.perf_counter() - start
+        start = time.perf_counter()
+        batch = BATCH_HASH_FUNCTIONS[function](keys)
+        batch_time = time.perf_counter() - start
+        assert batch.tolist() == scalar
+        print(f"{function.__name__:<16} {scalar_time:>9.3f} {batch_time:>8.3f} {scalar_time / batch_time:>7.1f}x")
+
+
+def bench_bulk_load(size: int) -> None:
+    """
+    Build a map by calling put in a loop from the default capacity and with
+    from_items, which sizes the table once and hashes the keys in one batch.
+    hash_function_2 uses the NumPy batch hash, the built-in hash does not.
+    """
+    print(f"{'map':<4} {'function':<16} {'size':>8} {'put loop s':>11} {'from_items s':>13} {'speedup':>8}")
+    for function, n in ((hash, size), (hash_function_2, size // 10)):
+        items = [('key' + str(i), i) for i in range(n)]
+        for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+            start = time.perf_counter()
+            m = module.HashMap(11, function)
+            for key, value in items:
+                m.put(key, value)
+            loop = time.perf_counter() - start
+            start = time.perf_counter()
+            module.HashMap.from_items(items, function=function)
+            bulk = time.perf_counter() - start
+            print(f"{name:<4} {getattr(function, '__name__', ''):<16} {n:>8} {loop:>11.2f} {bulk:>13.2f} {loop / bulk:>7.1f}x")
+
+
+def sample_keys(kind: str, size: int, rng: random.Random) -> list:
+    """
+    Return size distinct keys of one of the kinds used in the benchmarks:
+    sequential ('str0', 'str1', ...), anagram (permutations of a few ID formats),
+    hex (random 16-digit hex IDs) or session ('user:<n>:session:<n>').
+    """
+    if kind == 'sequential':
+        return ['str' + str(i) for i in range(size)]
+    if kind == 'anagram':
+        keys = {}
+        for base in itertools.count():
+            for p in itertools.permutations('ID' + f"{base:06d}"):
+                keys[''.join(p)] = None
+            if len(keys) >= size:
+                return list(keys)[:size]
+    if kind == 'hex':
+        return list({f"{rng.getrandbits(64):016x}" for _ in range(size)})
+    if kind == 'session':
+        return [f"user:{i // 10}:session:{i % 10}" for i in range(size)]
+    raise ValueError(kind)
+
+
+def distribution_report(function, keys: list, capacity: int) -> dict:
+    """
+    Hash keys into capacity buckets and measure how even the spread is.
+
+    :return: dict with chi_square (divided by its degrees of freedom, about 1.0
+        for a uniform hash), max_chain and empty bucket fraction
+    """
+    counts = [0] * capacity
+    for key in keys:
+        counts[function(key) % capacity] += 1
+    expected = len(keys) / capacity
+    chi_square = sum((count - expected) ** 2 for count in counts) / expected
+    return {'chi_square': chi_square / (capacity - 1),
+            'max_chain': max(counts),
+            'empty': counts.count(0) / capacity}
+
+
+def bench_hash_quality(size: int) -> None:
+    """
+    Distribution quality of the sample and seeded hash functions on several kinds
+    of keys, hashed into a prime number of buckets at load factor 1.
+    """
+    rng = random.Random(0)
+    capacity = hash_map_sc.HashMap()._next_prime(size)
+    functions = [('hash_function_1', hash_function_1), ('hash_function_2', hash_function_2)]
+    for function in (fnv1a_hash, siphash, mix_hash):
+        functions.append((function.__name__, bind_seed(function)[0]))
+    print(f"{'keys':<11} {'function':<16} {'chi2/dof':>10} {'max chain':>10} {'empty':>6} {'keys/s':>9}")
+    for kind in ('sequential', 'anagram', 'hex', 'session'):
+        keys = sample_keys(kind, size, rng)
+        for name, function in functions:
+            start = time.perf_counter()
+            report = distribution_report(function, keys, capacity)
+            elapsed = time.perf_counter() - start
+            print(f"{kind:<11} {name:<16} {report['chi_square']:>10.2f} {report['max_chain']:>10} "
+                  f"{report['empty']:>6.2f} {len(keys) / elapsed:>9.0f}")
+
+
+def bench_sparse_buckets(size: int) -> None:
+    """
+    Memory per entry, resize time and clear time of the chaining map at the load
+    factors it runs at between doublings (0.5 to 1.0).
+    """
+    print(f"{'load':<6} {'capacity':>9} {'bytes/entry':>12} {'resize ms':>10} {'clear ms':>9}")
+    for load in (0.5, 0.75, 1.0):
+        capacity = int(size / load)
+        keys = ['key' + str(i) for i in range(size)]
+        gc.collect()
+        tracemalloc.start()
+        m = hash_map_sc.HashMap(capacity, hash)
+        for key in keys:
+            m.put(key, key)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        m.resize_table(m.get_capacity() * 2)
+        resize = time.perf_counter() - start
+        start = time.perf_counter()
+        m.clear()
+        clear = time.perf_counter() - start
+        print(f"{load:<6} {capacity:>9} {used / size:>12.1f} {resize * 1000:>10.1f} {clear * 1000:>9.1f}")
+        del m
+
+
+def bench_long_chains(size: int) -> None:
+    """
+    Chaining map under hash_function_1 with anagram keys, which pile up in a few
+    buckets. Long chains are binary searched once they are turned into sorted buckets.
+    """
+    rng = random.Random(0)
+    print(f"{'keys':>8} {'longest':>8} {'sorted':>7} {'hit probes':>11} "
+          f"{'put/s':>9} {'get/s':>9} {'remove/s':>9}")
+    n = 1000
+    while n <= size:
+        keys = sample_keys('anagram', n, rng)
+        m = hash_map_sc.HashMap(11, hash_function_1)
+        start = time.perf_counter()
+        for key in keys:
+            m.put(key, key)
+        put = time.perf_counter() - start
+        stats = m.stats()
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        get = time.perf_counter() - start
+        start = time.perf_counter()
+        for key in keys:
+            m.remove(key)
+        remove = time.perf_counter() - start
+        print(f"{n:>8} {stats['longest_chain']:>8} {stats['sorted_buckets']:>7} "
+              f"{stats['expected_hit_probes']:>11.1f} {n / put:>9.0f} {n / get:>9.0f} {n / remove:>9.0f}")
+        n *= 10
+
+
+def chain_position(m, key: str) -> int:
+    """Return how many nodes a lookup of key walks in its chain of the chaining map m."""
+    hash_value = m._hash_function(key)
+    bucket = m._buckets[m._home(hash_value, m._capacity)]
+    if isinstance(bucket, SortedBucket):
+        return bucket.length().bit_length()
+    visited = 0
+    for node in bucket or ():
+        visited += 1
+        if node.hash_value == hash_value and node.key == key:
+            break
+    return visited
+
+
+def bench_skewed_reads(size: int) -> None:
+    """
+    Zipf(1.1) distributed gets on a full chaining map (load 1.0) with each bucket
+    policy. Nodes visited are averaged over the whole read stream, so the cost of
+    moving hot keys forward is included; the timing is a second pass of the same reads.
+    """
+    rng = random.Random(0)
+    keys = sample_keys('sequential', size, rng)
+    rng.shuffle(keys)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(size)]
+    reads = rng.choices(keys, weights=weights, k=size)
+
+    print(f"{'function':<16} {'policy':<14} {'nodes/get':>10} {'get/s':>9}")
+    for function in (fnv1a_hash, mix_hash):
+        for policy in (None, 'move_to_front', 'transpose'):
+            m = hash_map_sc.HashMap(size, function, bucket_policy=policy)
+            for key in keys:
+                m.put(key, key)
+            visited = 0
+            for key in reads:
+                visited += chain_position(m, key)
+                m.get(key)
+            start = time.perf_counter()
+            for key in reads:
+                m.get(key)
+            elapsed = time.perf_counter() - start
+            print(f"{function.__name__:<16} {str(policy):<14} {visited / len(reads):>10.2f} "
+                  f"{len(reads) / elapsed:>9.0f}")
+
+
+def bench_relink_resize(size: int) -> None:
+    """
+    Doubling a full chaining map by relinking its nodes (resize_table) against
+    rehashing every key into a new map of the same capacity with put, which is
+    what resize_table did before. Each method runs twice on a fresh map, once
+    timed and once under tracemalloc for the memory the resize adds at its peak.
+    Run with --size 10000000 for 10M entries.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+
+    def resize(method: str, traced: bool) -> float:
+        m = hash_map_sc.HashMap(size, mix_hash)
+        for key in keys:
+            m.put(key, key)
+        pairs = m.get_keys_and_values() if method == 'rehash' else None
+        capacity = m.get_capacity() * 2
+        gc.collect()
+        gc.disable()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        if method == 'rehash':
+            new = hash_map_sc.HashMap(capacity, mix_hash, seed=m._seed)
+            for i in range(pairs.length()):
+                new.put(*pairs[i])
+        else:
+            m.resize_table(capacity)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        return tracemalloc.get_traced_memory()[1] - base if traced else elapsed
+
+    print(f"{'method':<8} {'seconds':>8} {'peak MB':>8}")
+    for method in ('rehash', 'relink'):
+        elapsed = resize(method, False)
+        tracemalloc.start()
+        peak = resize(method, True)
+        tracemalloc.stop()
+        print(f"{method:<8} {elapsed:>8.2f} {peak / 2 ** 20:>8.1f}")
+
+
+def bench_frequency_count(size: int) -> None:
+    """
+    Counting Zipf(1.1) distributed words, the find_mode workload, with the
+    contains_key/get/put sequence against a single increment call per word.
+    """
+    rng = random.Random(0)
+    words = sample_keys('sequential', max(size // 10, 1), rng)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(words))]
+    stream = rng.choices(words, weights=weights, k=size)
+
+    print(f"{'map':<4} {'function':<16} {'get+put/s':>10} {'increment/s':>12} {'speedup':>8}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        for function in (hash_function_2, mix_hash):
+            m = module.HashMap(11, function)
+            start = time.perf_counter()
+            for word in stream:
+                if m.contains_key(word):
+                    m.put(word, m.get(word) + 1)
+                else:
+                    m.put(word, 1)
+            separate = time.perf_counter() - start
+
+            m = module.HashMap(11, function)
+            start = time.perf_counter()
+            for word in stream:
+                m.increment(word)
+            single = time.perf_counter() - start
+            print(f"{name:<4} {function.__name__:<16} {size / separate:>10.0f} {size / single:>12.0f} "
+                  f"{separate / single:>7.1f}x")
+
+    da = hash_map_sc.DynamicArray(stream)
+    start = time.perf_counter()
+    hash_map_sc.find_mode(da)
+    print(f"find_mode: {size / (time.perf_counter() - start):.0f} elements/s")
+
+
+def bench_heavy_hitters(size: int) -> None:
+    """
+    Throughput, peak memory and top-10 accuracy of the streaming heavy hitters
+    summaries on a Zipf(1.1) stream over size / 2 distinct keys, with the
+    default epsilon of 0.001.
+    """
+    rng = random.Random(0)
+    words = sample_keys('sequential', max(size // 2, 1), rng)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(words))]
+    stream = rng.choices(words, weights=weights, k=size)
+
+    exact = None
+    print(f"{'summary':<13} {'items/s':>9} {'peak MB':>8} {'top-10 hits':>12} {'max overcount':>14}")
+    for method in ('exact', 'space_saving', 'count_min'):
+        gc.collect()
+        start = time.perf_counter()
+        summary = heavy_hitters.SUMMARIES[method](10)
+        summary.update(stream)
+        elapsed = time.perf_counter() - start
+
+        # a second run under tracemalloc for the memory
+        tracemalloc.start()
+        heavy_hitters.SUMMARIES[method](10).update(stream)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        top = summary.top()
+        top = [top[i] for i in range(top.length())]
+        if exact is None:
+            exact = summary
+            true_top = {item for item, _ in top}
+        hits = sum(item in true_top for item, _ in top)
+        overcount = max(count - exact.estimate(item) for item, count in top)
+        print(f"{method:<13} {size / elapsed:>9.0f} {peak / 2 ** 20:>8.1f} {hits:>12} {overcount:>14}")
+
+
+def bench_parallel_mode(size: int) -> None:
+    """
+    find_mode against find_mode_parallel with 1 to os.cpu_count() workers (at least
+    2) on Zipf(1.1) distributed words over size / 10 distinct keys. Process start-up
+    and pickling of the chunks and partial counts are included in the timings.
+    """
+    rng = random.Random(0)
+    words = sample_keys('sequential', max(size // 10, 1), rng)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(words))]
+    da = hash_map_sc.DynamicArray(rng.choices(words, weights=weights, k=size))
+
+    start = time.perf_counter()
+    expected = hash_map_sc.find_mode(da)
+    serial = time.perf_counter() - start
+    print(f"{os.cpu_count()} cpus")
+    print(f"{'workers':<8} {'seconds':>8} {'speedup':>8}")
+    print(f"{'serial':<8} {serial:>8.2f} {1:>7.2f}x")
+    for workers in range(1, max(os.cpu_count() or 1, 2) + 1):
+        start = time.perf_counter()
+        mode, frequency = hash_map_sc.find_mode_parallel(da, workers)
+        elapsed = time.perf_counter() - start
+        assert frequency == expected[1] and mode.length() == expected[0].length()
+        print(f"{workers:<8} {elapsed:>8.2f} {serial / elapsed:>7.2f}x")
+
+
+class LockedMap:
+    """Chaining HashMap behind one lock, the baseline for the concurrent map."""
+
+    def __init__(self, function) -> None:
+        """Initialize an empty map and its lock."""
+        self._map = hash_map_sc.HashMap(11, function)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        """Insert or update key."""
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """Return value of key, or None."""
+        with self._lock:
+            return self._map.get(key)
+
+    def get_size(self) -> int:
+        """Return number of keys."""
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """Return number of buckets."""
+        return self._map.get_capacity()
+
+
+def bench_concurrent(size: int) -> None:
+    """
+    Throughput of 90% get / 10% put on one shared map from 1 to 8 threads: the
+    chaining map behind a single lock against the lock-striped ConcurrentHashMap.
+    Both maps start empty at capacity 11 and every put adds a new key, so the table
+    grows several times while the other threads read. Each thread reads back keys
+    it has already written and records any it does not find. The total number of
+    operations is fixed, so on a free-threaded build ops/s should grow with the
+    threads; with the GIL they cannot run in parallel. After the run every key
+    written must read back.
+    """
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{os.cpu_count()} cpus, GIL {'enabled' if gil else 'disabled'}")
+    keys = ['key' + str(i) for i in range(size // 10)]
+
+    print(f"{'map':<8} {'threads':>7} {'ops/s':>9} {'capacity':>9}")
+    for name in ('locked', 'striped'):
+        for threads in (1, 2, 4, 8):
+            # every put of a thread is followed by 9 gets of keys it wrote before
+            parts = []
+            for t in range(threads):
+                rng = random.Random(t)
+                written = []
+                part = []
+                for key in keys[t::threads]:
+                    written.append(key)
+                    part.append((True, key))
+                    part.extend((False, rng.choice(written)) for _ in range(9))
+                parts.append(part)
+
+            if name == 'locked':
+                m = LockedMap(mix_hash)
+            else:
+                m = hash_map_concurrent.ConcurrentHashMap(11, mix_hash)
+            errors = []
+
+            def worker(part: list) -> None:
+                for is_put, key in part:
+                    if is_put:
+                        m.put(key, key)
+                    elif m.get(key) != key:
+                        errors.append(key)
+
+            workers = [threading.Thread(target=worker, args=(part,)) for part in parts]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            assert not errors, f"{len(errors)} reads missed a written key, first {errors[0]}"
+            assert m.get_size() == len(keys) and all(m.get(key) == key for key in keys)
+            operations = sum(len(part) for part in parts)
+            print(f"{name:<8} {threads:>7} {operations / elapsed:>9.0f} {m.get_capacity():>9}")
+
+
+def bench_snapshot_iteration(size: int) -> None:
+    """
+    Walking a full open addressing map while it is written to: through a snapshot
+    against copying it out with get_keys_and_values first. Puts (updates of existing
+    keys) are interleaved with the walk at 1 per 10 entries and 1 per entry. Reports
+    the time for walk and puts, the longest stall between two puts and the memory
+    the walk adds at its peak.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+    rng = random.Random(0)
+    updates = [rng.choice(keys) for _ in range(size)]
+    clock = time.perf_counter
+
+    print(f"{'method':<20} {'puts/entry':>10} {'seconds':>8} {'stall ms':>9} {'peak MB':>8}")
+    for every in (10, 1):
+        for method in ('get_keys_and_values', 'snapshot'):
+            m = hash_map_oa.HashMap(size * 2, mix_hash)
+            for key in keys:
+                m.put(key, 0)
+            gc.collect()
+            for traced in (False, True):
+                if traced:
+                    tracemalloc.start()
+                start = last = clock()
+                stall = 0.0
+                if method == 'get_keys_and_values':
+                    pairs = m.get_keys_and_values()
+                    walk = (pairs[i] for i in range(pairs.length()))
+                else:
+                    walk = m.snapshot()
+                for i, _ in enumerate(walk):
+                    if i % every == 0:
+                        m.put(updates[i], 1)
+                        now = clock()
+                        stall = max(stall, now - last)
+                        last = now
+                walk = pairs = None
+                if traced:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                else:
+                    elapsed, longest = clock() - start, stall
+            print(f"{method:<20} {1 / every:>10.1f} {elapsed:>8.2f} {longest * 1000:>9.1f} {peak / 2 ** 20:>8.1f}")
+
+
+def bench_loop_lag(size: int) -> None:
+    """
+    Event loop stalls while a coroutine puts size keys into a map, yielding to the
+    loop every 100 puts. A ticker coroutine sleeps 1 ms at a time and records how
+    late it wakes up, so a resize that rehashes the whole table inside one put shows
+    up as the max lag. The blocking maps resize in place, the AsyncHashMaps move the
+    buckets in a background task. Every run also checks the map's size and values.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+
+    async def fill(m) -> tuple:
+        lags = []
+        done = False
+
+        async def ticker() -> None:
+            while not done:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        for i, key in enumerate(keys):
+            m.put(key, i)
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+        if isinstance(m, hash_map_async.AsyncHashMap):
+            await m.finish_resize()
+        elapsed = time.perf_counter() - start
+        done = True
+        await task
+        lags.sort()
+        return elapsed, lags
+
+    print(f"{'map':<10} {'seconds':>8} {'p50 lag ms':>10} {'p99 lag ms':>10} {'max lag ms':>10}")
+    for name in ('sc', 'sc async', 'oa', 'oa async'):
+        if name == 'sc':
+            m = hash_map_sc.HashMap(11, mix_hash)
+        elif name == 'oa':
+            m = hash_map_oa.HashMap(11, mix_hash)
+        else:
+            m = hash_map_async.AsyncHashMap(11, mix_hash, kind=name.split()[0])
+        # the collector is paused so its full collections do not show up as lag
+        gc.collect()
+        gc.disable()
+        try:
+            elapsed, lags = asyncio.run(fill(m))
+        finally:
+            gc.enable()
+
+        assert m.get_size() == size and all(m.get(keys[i]) == i for i in range(0, size, 97))
+        print(f"{name:<10} {elapsed:>8.2f} {percentile(lags, 0.5):>10.2f} "
+              f"{percentile(lags, 0.99):>10.2f} {lags[-1]:>10.2f}")
+
+
+def bench_mapped_open(size: int) -> None:
+    """
+    Startup cost of a lookup table of size keys: building an open addressing map
+    with from_items against opening a MappedHashMap file built beforehand. Reports
+    the startup time, the time for size gets afterwards and the Python heap the
+    startup allocates (pages of the mapped file are shared and not counted).
+    """
+    keys = ['key' + str(i) for i in range(size)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+    rng = random.Random(0)
+    lookups = [rng.choice(keys) for _ in range(size)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'table.hmap')
+        start = time.perf_counter()
+        hash_map_mmap.MappedHashMap.build(path, pairs, mix_hash).close()
+        print(f"build {time.perf_counter() - start:.2f} s, file {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+        def open_table(method: str):
+            if method == 'from_items':
+                return hash_map_oa.HashMap.from_items(pairs, function=mix_hash)
+            return hash_map_mmap.MappedHashMap(path)
+
+        print(f"{'method':<12} {'startup s':>10} {'gets s':>8} {'heap MB':>8}")
+        for method in ('from_items', 'mapped'):
+            gc.collect()
+            start = time.perf_counter()
+            m = open_table(method)
+            startup = time.perf_counter() - start
+            start = time.perf_counter()
+            for key in lookups:
+                m.get(key)
+            gets = time.perf_counter() - start
+            assert m.get_size() == size and all(m.get(keys[i]) == i for i in range(0, size, 97))
+            if method == 'mapped':
+                m.close()
+            del m
+
+            gc.collect()
+            tracemalloc.start()
+            m = open_table(method)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if method == 'mapped':
+                m.close()
+            del m
+            print(f"{method:<12} {startup:>10.4f} {gets:>8.2f} {peak / 2 ** 20:>8.1f}")
+
+
+def bench_dump_load(size: int) -> None:
+    """
+    Restart cost of a map of size keys: rebuilding it with put from its pairs
+    against dump to a file and load from it, which keeps the bucket layout and the
+    stored hashes. siphash is used since it is the slowest hash to recompute.
+    """
+    keys = ['key' + str(i) for i in range(size)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'map.dump')
+        print(f"{'map':<4} {'put s':>7} {'dump s':>7} {'load s':>7} {'file MB':>8}")
+        for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+            m = module.HashMap(11, siphash)
+            for i, key in enumerate(keys):
+                m.put(key, i)
+            pairs = m.get_keys_and_values()
+
+            gc.collect()
+            start = time.perf_counter()
+            rebuilt = module.HashMap(11, siphash)
+            for i in range(pairs.length()):
+                rebuilt.put(*pairs[i])
+            put_time = time.perf_counter() - start
+            del rebuilt
+
+            start = time.perf_counter()
+            m.dump(path)
+            dump_time = time.perf_counter() - start
+
+            gc.collect()
+            start = time.perf_counter()
+            loaded = module.HashMap.load(path)
+            load_time = time.perf_counter() - start
+
+            assert loaded.get_size() == size and all(loaded.get(keys[i]) == i for i in range(0, size, 97))
+            print(f"{name:<4} {put_time:>7.2f} {dump_time:>7.2f} {load_time:>7.2f} "
+                  f"{os.path.getsize(path) / 2 ** 20:>8.1f}")
+
+
+def rss_mb() -> float:
+    """
+    Return the resident set size of this process in MB, or NaN where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return float('nan')
+
+
+def shrink_phases(name: str, shrink_load: float, size: int) -> list:
+    """
+    Run bench_shrink's workload on one map and return (phase, capacity, rss MB) rows.
+    Called in a freshly spawned process so the RSS is the map's alone.
+    """
+    module = hash_map_sc if name == 'sc' else hash_map_oa
+    rng = random.Random(0)
+    keys = ['key' + str(i) for i in range(size)]
+    m = module.HashMap(11, mix_hash, shrink_load=shrink_load)
+    rows = [('start', m.get_capacity(), rss_mb())]
+    for burst in range(3):
+        for key in keys:
+            m.put(key, key)
+        rows.append(('burst', m.get_capacity(), rss_mb()))
+        drained = keys[:]
+        rng.shuffle(drained)
+        for key in drained[:size - size // 100]:
+            m.remove(key)
+        del drained
+        gc.collect()
+        rows.append(('drain', m.get_capacity(), rss_mb()))
+    return rows
+
+
+def bench_shrink(size: int) -> None:
+    """
+    Process RSS over a burst-then-drain workload: size keys are put, then all but
+    1% are removed, three times over, with and without shrink_load=1/8. Every map
+    runs in its own spawned process. RSS after a drain includes freed memory the
+    allocator keeps for reuse, so it falls by less than the map shrinks.
+    """
+    context = multiprocessing.get_context('spawn')
+    print(f"{'map':<10} {'phase':<6} {'capacity':>9} {'rss MB':>8}")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context, max_tasks_per_child=1) as pool:
+        for name in ('sc', 'oa'):
+            for shrink_load in (None, 1 / 8):
+                label = name + (' shrink' if shrink_load else '')
+                for phase, capacity, rss in pool.submit(shrink_phases, name, shrink_load, size).result():
+                    print(f"{label:<10} {phase:<6} {capacity:>9} {rss:>8.1f}")
+
+
+def bench_clear_refill(size: int) -> None:
+    """
+    Tight clear/refill loop on scratch maps with a capacity of 1%, 10% and 100% of
+    size: every round clears the map, puts 32 keys and reads them back. clear resets
+    the bucket array in O(1); creating a new map of the same capacity is timed as
+    the alternative.
+    """
+    keys = ['key' + str(i) for i in range(32)]
+    rounds = 2000
+    print(f"{'map':<4} {'capacity':>9} {'method':<8} {'us/round':>9}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        for capacity in (size // 100, size // 10, size):
+            m = module.HashMap(capacity, mix_hash)
+            for method in ('clear', 'new'):
+                gc.collect()
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    if method == 'clear':
+                        m.clear()
+                    else:
+                        m = module.HashMap(capacity, mix_hash)
+                    for key in keys:
+                        m.put(key, key)
+                    for key in keys:
+                        m.get(key)
+                elapsed = time.perf_counter() - start
+                assert m.get_size() == len(keys)
+                print(f"{name:<4} {m.get_capacity():>9} {method:<8} {elapsed / rounds * 1e6:>9.1f}")
+
+
+BENCHMARKS = {
+    'incremental_resize': bench_incremental_resize,
+    'resize_long_keys': bench_resize_long_keys,
+    'session_churn': bench_session_churn,
+    'compact_storage': bench_compact_storage,
+    'robin_hood': bench_robin_hood,
+    'power_of_two': bench_power_of_two,
+    'batch_hashing': bench_batch_hashing,
+    'bulk_load': bench_bulk_load,
+    'hash_quality': bench_hash_quality,
+    'sparse_buckets': bench_sparse_buckets,
+    'long_chains': bench_long_chains,
+    'skewed_reads': bench_skewed_reads,
+    'relink_resize': bench_relink_resize,
+    'frequency_count': bench_frequency_count,
+    'heavy_hitters': bench_heavy_hitters,
+    'parallel_mode': bench_parallel_mode,
+    'concurrent': bench_concurrent,
+    'snapshot_iteration': bench_snapshot_iteration,
+    'loop_lag': bench_loop_lag,
+    'mapped_open': bench_mapped_open,
+    'dump_load': bench_dump_load,
+    'shrink': bench_shrink,
+    'clear_refill': bench_clear_refill,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hashmap benchmarks')
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run, any of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--size', type=int, default=200_000, help='number of keys')
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark '{name}'")
+
+    for name in args.names or BENCHMARKS:
+        print(f"\n{name} (size={args.size})")
+        print('-' * (len(name) + 13 + len(str(args.size))))
+        BENCHMARKS[name](args.size)
@@ -0,0 +1,216 @@
+# Description: Workload benchmark suite comparing the separate chaining map, the open
+# addressing map and the built-in dict.
+#
+# Every run prints one JSON object per (workload, size, map) to stdout, or to the file
+# given with --output, so results can be stored and compared between versions:
+#
+#   python bench_suite.py --max-size 1000000 --output results.jsonl
+#   python bench_suite.py --workloads zipf miss_heavy --maps sc oa
+#
+# The adversarial workload is made of keys that collide under hash_function_1. Unless
+# --hash is hash_function_1 already, sc and oa run it a second time with that function
+# (the 'hash' field tells the records apart), up to --adversarial-max-size keys, since
+# with every key in one probe sequence the open addressing map takes quadratic time.
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import (fnv1a_hash, hash_function_1, hash_function_2, mix_hash,
+                        siphash)
+from bench import percentile, sample_keys
+
+WORKLOADS = ('uniform', 'zipf', 'delete_heavy', 'miss_heavy', 'adversarial')
+
+HASH_FUNCTIONS = {function.__name__: function for function in
+                  (hash_function_1, hash_function_2, fnv1a_hash, siphash, mix_hash)}
+
+
+class DictMap:
+    """
+    Built-in dict behind the HashMap interface, used as the baseline.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty dict."""
+        self._data = {}
+
+    def put(self, key: str, value: object) -> None:
+        """Insert or update key."""
+        self._data[key] = value
+
+    def get(self, key: str) -> object:
+        """Return value of key, or None."""
+        return self._data.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """Return True if key is present."""
+        return key in self._data
+
+    def remove(self, key: str) -> None:
+        """Remove key if present."""
+        self._data.pop(key, None)
+
+    def get_size(self) -> int:
+        """Return number of keys."""
+        return len(self._data)
+
+
+MAPS = {
+    'sc': lambda function: hash_map_sc.HashMap(11, function),
+    'oa': lambda function: hash_map_oa.HashMap(11, function),
+    'dict': lambda function: DictMap(),
+}
+
+
+def make_operations(workload: str, size: int, rng: random.Random) -> tuple:
+    """
+    Return the keys to preload and the list of (operation, key) pairs to time for a workload.
+
+    uniform: 80% gets of random present keys, 20% puts
+    zipf: like uniform, but keys are drawn from a Zipf(1.1) distribution
+    delete_heavy: 40% removes, 40% puts of new keys, 20% gets
+    miss_heavy: 90% gets of absent keys, 10% gets of present keys
+    adversarial: anagram keys that all collide under hash_function_1, half puts, half gets
+    """
+    kind = 'anagram' if workload == 'adversarial' else 'sequential'
+    keys = sample_keys(kind, 2 * size, rng)
+    present, fresh = keys[:size], keys[size:]
+
+    if workload == 'zipf':
+        weights = [1 / (rank + 1) ** 1.1 for rank in range(size)]
+        picks = rng.choices(present, weights=weights, k=size)
+    else:
+        picks = [rng.choice(present) for _ in range(size)]
+
+    operations = []
+    for i, key in enumerate(picks):
+        roll = rng.random()
+        if workload in ('uniform', 'zipf'):
+            operations.append(('put' if roll < 0.2 else 'get', key))
+        elif workload == 'delete_heavy':
+            if roll < 0.4:
+                operations.append(('remove', key))
+            elif roll < 0.8:
+                operations.append(('put', fresh[i]))
+            else:
+                operations.append(('get', key))
+        elif workload == 'miss_heavy':
+            operations.append(('get', fresh[i] if roll < 0.9 else key))
+        else:
+            operations.append(('put' if roll < 0.5 else 'get', fresh[i] if roll < 0.25 else key))
+    return present, operations
+
+
+def run_operations(m, operations: list) -> list:
+    """
+    Apply the operations to the map and return the sorted latency of each in microseconds.
+    """
+    latencies = []
+    clock = time.perf_counter_ns
+    for operation, key in operations:
+        if operation == 'get':
+            start = clock()
+            m.get(key)
+        elif operation == 'put':
+            start = clock()
+            m.put(key, key)
+        else:
+            start = clock()
+            m.remove(key)
+        latencies.append((clock() - start) / 1000)
+    latencies.sort()
+    return latencies
+
+
+def run_case(map_name: str, function, workload: str, size: int, seed: int) -> dict:
+    """
+    Time one workload on one map and return the result record.
+    The operations are timed without tracemalloc; a second run measures peak memory.
+    """
+    present, operations = make_operations(workload, size, random.Random(seed))
+
+    gc.collect()
+    m = MAPS[map_name](function)
+    start = time.perf_counter()
+    for key in present:
+        m.put(key, key)
+    load_time = time.perf_counter() - start
+    latencies = run_operations(m, operations)
+    run_time = sum(latencies) / 1e6
+    stats = m.stats(full=False) if hasattr(m, 'stats') else {}
+    del m
+
+    gc.collect()
+    tracemalloc.start()
+    m = MAPS[map_name](function)
+    for key in present:
+        m.put(key, key)
+    run_operations(m, operations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del m
+
+    return {
+        'workload': workload,
+        'size': size,
+        'map': map_name,
+        'hash': function.__name__ if map_name != 'dict' else 'builtin',
+        'load_ops_per_sec': len(present) / load_time,
+        'ops_per_sec': len(operations) / run_time,
+        'latency_us': {'p50': percentile(latencies, 0.5),
+                       'p90': percentile(latencies, 0.9),
+                       'p99': percentile(latencies, 0.99),
+                       'p999': percentile(latencies, 0.999),
+                       'max': latencies[-1]},
+        'peak_memory_bytes': peak,
+        'resizes': stats.get('resizes'),
+        'resize_time': stats.get('resize_time'),
+        'python': sys.version.split()[0],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hashmap workload benchmark suite')
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--maps', nargs='+', choices=list(MAPS), default=list(MAPS))
+    parser.add_argument('--min-size', type=int, default=10 ** 3, help='smallest key count')
+    parser.add_argument('--max-size', type=int, default=10 ** 5,
+                        help='largest key count, sizes go up by factors of 10 (up to 10**7)')
+    parser.add_argument('--hash', choices=list(HASH_FUNCTIONS), default='mix_hash',
+                        help='hash function for sc and oa')
+    parser.add_argument('--adversarial-max-size', type=int, default=10 ** 4,
+                        help='largest key count for the adversarial runs with hash_function_1')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the generated workloads')
+    parser.add_argument('--output', help='append JSON lines to this file instead of stdout')
+    args = parser.parse_args()
+
+    sizes = []
+    size = args.min_size
+    while size <= args.max_size:
+        sizes.append(size)
+        size *= 10
+
+    out = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for size in sizes:
+            for workload in args.workloads:
+                for map_name in args.maps:
+                    functions = [HASH_FUNCTIONS[args.hash]]
+                    # the keys are only adversarial for hash_function_1, so report that case too
+                    if (workload == 'adversarial' and map_name != 'dict' and args.hash != 'hash_function_1'
+                            and size <= args.adversarial_max_size):
+                        functions.append(hash_function_1)
+                    for function in functions:
+                        result = run_case(map_name, function, workload, size, args.seed)
+                        out.write(json.dumps(result) + '\n')
+                        out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
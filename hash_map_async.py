@@ -0,0 +1,285 @@
+# Description: Hashmap for asyncio code that grows its table in a background task.
+
+import asyncio
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1
+
+# maps AsyncHashMap can wrap, by the kind argument
+KINDS = {
+    'sc': hash_map_sc.HashMap,
+    'oa': hash_map_oa.HashMap,
+}
+
+
+class AsyncHashMap:
+    """
+    Separate chaining or open addressing HashMap for use on an asyncio event loop.
+
+    The map is created with incremental_resize, so the put that grows the table only
+    allocates the new bucket array. The old buckets are then moved by a background
+    task, chunk buckets at a time, which yields to the loop after every chunk; no
+    single step blocks the loop for the whole rehash. Operations stay synchronous
+    and see every key while the move is in progress, since the map looks in both
+    tables until the old one is empty. Each operation also moves migration_batch
+    buckets itself, so a resize finishes even when the loop never runs the task.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1, *,
+                 kind: str = 'sc',
+                 chunk: int = 256,
+                 migration_batch: int = 4,
+                 **options) -> None:
+        """
+        Initialize new AsyncHashMap
+
+        :param kind: 'sc' for hash_map_sc.HashMap or 'oa' for hash_map_oa.HashMap
+        :param chunk: (int) number of old buckets the background task moves between
+            two yields to the event loop
+        :param migration_batch: number of old buckets moved by every operation
+        :param options: other keyword arguments for the wrapped HashMap
+        """
+        if kind not in KINDS:
+            raise ValueError(f"unknown map kind {kind!r}")
+        self._map = KINDS[kind](capacity, function, incremental_resize=True,
+                                migration_batch=migration_batch, **options)
+        self._chunk = chunk
+
+        # background migration, a reference is kept since the loop only holds a weak one
+        self._task = None
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._map)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    def _schedule(self) -> None:
+        """
+        Start the background migration if a resize is in progress and no task is
+        moving it yet. Outside of a running event loop the operations move the
+        buckets on their own.
+        """
+        if self._task is not None and not self._task.done():
+            return
+        if not self._map.migrate_step(0):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self.finish_resize())
+
+    async def finish_resize(self) -> None:
+        """
+        Wait until no resize is in progress, moving the remaining buckets chunk by
+        chunk and yielding to the event loop in between. Runs as the background task.
+        """
+        while self._map.migrate_step(self._chunk):
+            await asyncio.sleep(0)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update key/value pair in hash map. If key exists, associated value replaced with the new value. If not in the hashmap, new key/value pair added.
+
+        :param key: key of the pair
+        :param value: value of pair
+        """
+        self._map.put(key, value)
+        self._schedule()
+
+    def upsert(self, key: str, fn, default: object = None) -> object:
+        """
+        Replace the value of key with fn(value). A missing key is treated as holding default.
+
+        :param key: key of the pair
+        :param fn: function from the current value to the new value
+        :param default: value fn receives when key is not in the map
+
+        :return: new value of key
+        """
+        value = self._map.upsert(key, fn, default)
+        self._schedule()
+        return value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Return the value of key, inserting key with value default first if it is missing.
+
+        :param key: key to search for
+        :param default: value stored for a missing key
+
+        :return: value of key
+        """
+        value = self._map.setdefault(key, default)
+        self._schedule()
+        return value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Add delta to the value of key, counting a missing key as 0.
+
+        :param key: key of the counter
+        :param delta: (int) amount to add
+
+        :return: (int) new value of key
+        """
+        value = self._map.increment(key, delta)
+        self._schedule()
+        return value
+
+    def get(self, key: str) -> object:
+        """
+        Return value associated with provided key. If not in the map, return None.
+
+        :param key: key to search for
+
+        :return: value of key
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determine if key exists in the hash map. Return true if it does, false otherwise.
+
+        :param: key to search for
+
+        :return: (bool) true if present, false otherwise
+        """
+        return self._map.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Remove given key and associated value from the has map. Does nothing if no such pair exists.
+
+        :param key: key to remove
+        """
+        # a remove can start a rehash that drops the tombstones of the OA map
+        self._map.remove(key)
+        self._schedule()
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Remove key and return its value, or default if the key is not in the map.
+
+        :param key: key to remove
+        :param default: value returned for a missing key
+
+        :return: removed value or default
+        """
+        value = self._map.pop(key, default)
+        self._schedule()
+        return value
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the table right away. Blocks the event loop for the
+        whole rehash, like the wrapped map's resize_table.
+
+        :param new_capacity: new capacity of the hash table
+        """
+        self._map.resize_table(new_capacity)
+
+    def table_load(self) -> float:
+        """
+        Determine current hash table load factor.
+
+        :return: (float) load factor
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Return number of empty buckets in the hash table.
+
+        :return: (int) number of empty buckets
+        """
+        return self._map.empty_buckets()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array where each index contains a tuple of each key/value pair stored in the hash map.
+
+        :return: Dynamic array
+        """
+        return self._map.get_keys_and_values()
+
+    def clear(self) -> None:
+        """
+        Clears contents of the hash map. Does not change capacity.
+        """
+        self._map.clear()
+
+    def stats(self, full: bool = True) -> dict:
+        """
+        Return the statistics of the wrapped map, see its stats method.
+
+        :param full: (bool) include the values that need a walk over the table
+
+        :return: (dict) statistics
+        """
+        return self._map.stats(full)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    async def main(kind: str) -> None:
+        m = AsyncHashMap(11, hash_function_1, kind=kind, chunk=8)
+        for i in range(200):
+            m.put('key' + str(i), i)
+            if i % 50 == 0:
+                await asyncio.sleep(0)
+        print(kind, m.get_size(), m.get_capacity(), m.stats(False)['migrating'],
+              m.get('key0'), m.get('key199'))
+        await m.finish_resize()
+        print(kind, m.get_size(), m.get_capacity(), m.stats(False)['migrating'],
+              m.pop('key0'), m.contains_key('key0'))
+
+    async def delete_heavy(kind: str) -> None:
+        # a resize started by remove must still be migrating when remove returns,
+        # a remove that rehashed the whole table leaves none in progress
+        m = AsyncHashMap(11, hash_function_1, kind=kind, chunk=8)
+        full_rehashes = 0
+        for batch in range(5):
+            for i in range(1000):
+                m.put('key' + str(batch) + '_' + str(i), i)
+            await asyncio.sleep(0)
+            for i in range(1000):
+                resizes = m.stats(False)['resizes']
+                m.remove('key' + str(batch) + '_' + str(i))
+                stats = m.stats(False)
+                if stats['resizes'] > resizes and not stats['migrating']:
+                    full_rehashes += 1
+                if i % 50 == 0:
+                    await asyncio.sleep(0)
+        await m.finish_resize()
+        print(kind, m.get_size(), m.stats(False)['resizes'] > 0, full_rehashes)
+
+    print("\nput 200 keys on an event loop")
+    print("-----------------------------")
+    for kind in KINDS:
+        asyncio.run(main(kind))
+
+    print("\ndelete heavy: size, resized, full rehashes inside remove")
+    print("-------------------------------------------------------")
+    for kind in KINDS:
+        asyncio.run(delete_heavy(kind))
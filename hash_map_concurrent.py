@@ -0,0 +1,373 @@
+# Description: Thread-safe hashmap with separate chaining and lock striping.
+
+import threading
+
+import hash_map_sc
+from a6_include import DynamicArray, SLNode, bind_seed, hash_function_1
+
+# marks a key that is not in the map for the compute functions of _write
+_MISSING = object()
+
+
+class ConcurrentHashMap:
+    """
+    Separate chaining hash map that can be shared between threads.
+
+    Buckets are spread over a fixed number of stripes (bucket index modulo the
+    number of stripes) and every write holds the lock of its stripe, so writes to
+    different stripes run in parallel. Reads take no lock: a chain is only ever
+    changed by linking a new node in at the head, relinking around a removed node
+    or assigning a node's value, so a reader walking a chain always sees a valid
+    list. A resize holds every stripe lock while it copies the nodes into a new
+    bucket array and then publishes that array with one assignment; readers keep
+    walking the old array, which is left untouched, until they next look it up.
+    """
+
+    # capacity is kept prime the same way as in hash_map_sc.HashMap
+    _next_prime = hash_map_sc.HashMap._next_prime
+    _is_prime = staticmethod(hash_map_sc.HashMap._is_prime)
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1, *,
+                 stripes: int = 16,
+                 seed: int = None) -> None:
+        """
+        Initialize new ConcurrentHashMap
+
+        :param stripes: (int) number of locks the buckets are divided between
+        :param seed: seed for the seeded hash functions in a6_include, random when omitted
+        """
+        # chains are SLNode heads stored straight in a list, so publishing a new
+        # head or a new table is a single reference assignment
+        self._buckets = [None] * self._next_prime(capacity)
+
+        self._hash_function, self._seed = bind_seed(function, seed)
+        self._stripes = stripes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+        # entries per stripe, each only changed under its stripe's lock
+        self._counts = [0] * stripes
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        buckets = self._buckets
+        out = ''
+        for i in range(len(buckets)):
+            nodes = []
+            node = buckets[i]
+            while node is not None:
+                nodes.append(str(node))
+                node = node.next
+            out += str(i) + ': SLL [' + ' -> '.join(nodes) + ']\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return len(self._buckets)
+
+    # ------------------------------------------------------------------ #
+
+    def _lock_bucket(self, hash_value: int) -> tuple:
+        """
+        Acquire the stripe lock of the bucket for a hash in the current table.
+        Retries if a resize published a new table while the lock was awaited.
+
+        :param hash_value: (int) full hash of the key
+
+        :return: (tuple) table, bucket index and stripe, with the stripe's lock held
+        """
+        while True:
+            table = self._buckets
+            index = hash_value % len(table)
+            stripe = index % self._stripes
+            self._locks[stripe].acquire()
+            if table is self._buckets:
+                return table, index, stripe
+            self._locks[stripe].release()
+
+    def _write(self, key: str, compute) -> object:
+        """
+        Set key to compute(current value) under its stripe lock, where the current
+        value is _MISSING if key is not in the map, and return the new value.
+
+        :param key: key of the pair
+        :param compute: function from the current value to the new value
+
+        :return: new value of key
+        """
+        hash_value = self._hash_function(key)
+        table, index, stripe = self._lock_bucket(hash_value)
+        try:
+            node = table[index]
+            while node is not None:
+                if node.hash_value == hash_value and node.key == key:
+                    node.value = compute(node.value)
+                    return node.value
+                node = node.next
+
+            # the node is complete before it becomes reachable from the bucket
+            value = compute(_MISSING)
+            table[index] = SLNode(key, value, table[index], hash_value)
+            self._counts[stripe] += 1
+            grow = self._counts[stripe] * self._stripes >= len(table)
+        finally:
+            self._locks[stripe].release()
+
+        # the stripe is full for its share of the table, check the whole load
+        if grow and self.table_load() >= 1.0:
+            self._resize(len(table) * 2, table)
+        return value
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update key/value pair in hash map. If key exists, associated value replaced with the new value. If not in the hashmap, new key/value pair added.
+
+        :param key: key of the pair
+        :param value: value of pair
+        """
+        self._write(key, lambda current: value)
+
+    def upsert(self, key: str, fn, default: object = None) -> object:
+        """
+        Atomically replace the value of key with fn(value). A missing key is
+        treated as holding default. fn runs while the stripe lock is held.
+
+        :param key: key of the pair
+        :param fn: function from the current value to the new value
+        :param default: value fn receives when key is not in the map
+
+        :return: new value of key
+        """
+        return self._write(key, lambda current: fn(default if current is _MISSING else current))
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Return the value of key, atomically inserting key with value default first if it is missing.
+
+        :param key: key to search for
+        :param default: value stored for a missing key
+
+        :return: value of key
+        """
+        return self._write(key, lambda current: default if current is _MISSING else current)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Atomically add delta to the value of key, counting a missing key as 0.
+
+        :param key: key of the counter
+        :param delta: (int) amount to add
+
+        :return: (int) new value of key
+        """
+        return self._write(key, lambda current: delta if current is _MISSING else current + delta)
+
+    def _unlink(self, key: str) -> SLNode:
+        """
+        Unlink key from its chain under its stripe lock and return its node, or None.
+        The removed node keeps its next link so readers standing on it can go on.
+
+        :param key: key to remove
+
+        :return: removed node or None
+        """
+        hash_value = self._hash_function(key)
+        table, index, stripe = self._lock_bucket(hash_value)
+        try:
+            previous, node = None, table[index]
+            while node is not None:
+                if node.hash_value == hash_value and node.key == key:
+                    if previous is None:
+                        table[index] = node.next
+                    else:
+                        previous.next = node.next
+                    self._counts[stripe] -= 1
+                    return node
+                previous, node = node, node.next
+            return None
+        finally:
+            self._locks[stripe].release()
+
+    def remove(self, key: str) -> None:
+        """
+        Remove given key and associated value from the has map. Does nothing if no such pair exists.
+
+        :param key: key to remove
+        """
+        self._unlink(key)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Remove key and return its value, or default if the key is not in the map.
+
+        :param key: key to remove
+        :param default: value returned for a missing key
+
+        :return: removed value or default
+        """
+        node = self._unlink(key)
+        return node.value if node is not None else default
+
+    def _find(self, key: str) -> SLNode:
+        """
+        Return the node holding key in the current table without locking, or None.
+
+        :param key: key to search for
+
+        :return: node or None
+        """
+        hash_value = self._hash_function(key)
+        table = self._buckets
+        node = table[hash_value % len(table)]
+        while node is not None:
+            if node.hash_value == hash_value and node.key == key:
+                return node
+            node = node.next
+        return None
+
+    def get(self, key: str) -> object:
+        """
+        Return value associated with provided key. If not in the map, return None.
+
+        :param key: key to search for
+
+        :return: value of key
+        """
+        node = self._find(key)
+        return node.value if node is not None else None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determine if key exists in the hash map. Return true if it does, false otherwise.
+
+        :param: key to search for
+
+        :return: (bool) true if present, false otherwise
+        """
+        return self._find(key) is not None
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capcity of the table. Transfer existing key/value pairs into the new table.
+
+        :param new_capacity: new capacity of the hash table
+        """
+        if new_capacity < 1:
+            return
+        self._resize(new_capacity, None)
+
+    def _resize(self, new_capacity: int, expected: list) -> None:
+        """
+        Copy every node into a new table while holding all stripe locks, then
+        publish it. Writers wait for the resize, readers keep using the old table.
+
+        :param new_capacity: new capacity of the hash table
+        :param expected: table the resize was decided on; nothing is done if another
+            resize has replaced it in the meantime. None resizes unconditionally.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            old_buckets = self._buckets
+            if expected is not None and expected is not old_buckets:
+                return
+
+            # ensure new capcity is prime, and large enough for every entry
+            size = sum(self._counts)
+            new_capacity = self._next_prime(new_capacity)
+            while new_capacity < size:
+                new_capacity = self._next_prime(new_capacity * 2)
+
+            # copy the nodes, the old chains stay intact for readers still walking them
+            new_buckets = [None] * new_capacity
+            counts = [0] * self._stripes
+            for node in old_buckets:
+                while node is not None:
+                    index = node.hash_value % new_capacity
+                    new_buckets[index] = SLNode(node.key, node.value, new_buckets[index], node.hash_value)
+                    counts[index % self._stripes] += 1
+                    node = node.next
+
+            self._counts = counts
+            self._buckets = new_buckets
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def table_load(self) -> float:
+        """
+        Determine current hash table load factor.
+
+        :return: (float) load factor
+        """
+        return self.get_size() / len(self._buckets)
+
+    def empty_buckets(self) -> int:
+        """
+        Return number of empty buckets in the hash table.
+
+        :return: (int) number of empty buckets
+        """
+        return self._buckets.count(None)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array where each index contains a tuple of each key/value pair stored in the hash map.
+        Takes no locks: pairs written while the walk is in progress may or may not be included.
+
+        :return: Dynamic array
+        """
+        new_array = DynamicArray()
+        for node in self._buckets:
+            while node is not None:
+                new_array.append((node.key, node.value))
+                node = node.next
+        return new_array
+
+    def clear(self) -> None:
+        """
+        Clears contents of the hash map. Does not change capacity.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            self._buckets = [None] * len(self._buckets)
+            self._counts = [0] * self._stripes
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput from 4 threads")
+    print("------------------")
+    m = ConcurrentHashMap(11, hash_function_1, stripes=4)
+
+    def writer(thread: int) -> None:
+        for i in range(500):
+            m.put('t' + str(thread) + 'k' + str(i), i)
+            m.increment('total')
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), m.get_capacity(), m.get('total'), m.get('t3k499'))
+
+    m.remove('total')
+    print(m.get_size(), m.contains_key('total'), m.pop('t0k0'), m.get_size())
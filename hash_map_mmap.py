@@ -0,0 +1,264 @@
+# Description: Read-only open addressing hashmap stored in a memory-mapped file.
+#
+# File layout, all integers little endian:
+#
+#   header  magic, format version, hash function id, seed, capacity, size
+#   slots   capacity fixed-width slots of (hash, key offset, value offset, state)
+#   heap    keys as a 4-byte length and their UTF-8 bytes, values as a 4-byte
+#           length and their pickle
+#
+# The slots are probed like the buckets of hash_map_oa.HashMap: prime capacity,
+# quadratic probing and a load factor below 0.5. Opening a file only maps it, so it
+# takes the same time for any size. A lookup reads the slots on its probe path and
+# compares the key in place, so only the pages it touches are read, and processes
+# that map the same file share those pages through the page cache.
+
+import mmap
+import os
+import pickle
+import struct
+
+import hash_map_oa
+from a6_include import (HASH_FUNCTIONS, MASK_64, DynamicArray, bind_seed,
+                        hash_function_id, mix_hash)
+
+MAGIC = b'HMAPMMAP'
+VERSION = 1
+
+# magic, version, hash function id, seed, capacity, size
+HEADER = struct.Struct('<8sII16sQQ')
+# hash, key offset, value offset, state
+SLOT = struct.Struct('<QQQB7x')
+LENGTH = struct.Struct('<I')
+
+# slot states; files are written in one go, so there are no tombstones
+EMPTY = 0
+OCCUPIED = 1
+
+
+class MappedHashMap:
+    """
+    Open addressing hash map in a file, for lookup tables that are built once and
+    then read by many processes. Write a file with MappedHashMap.build and open it
+    with MappedHashMap(path); changing the contents means building a new file.
+    Keys are strings, values anything pickle can store.
+    """
+
+    # capacity is kept prime the same way as in hash_map_oa.HashMap
+    _next_prime = hash_map_oa.HashMap._next_prime
+    _is_prime = staticmethod(hash_map_oa.HashMap._is_prime)
+
+    def __init__(self, path: str) -> None:
+        """
+        Map an existing file written by build. Nothing but the header is read.
+
+        :param path: path of the file
+        """
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, function_id, seed, capacity, size = HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a MappedHashMap file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+
+        self._hash_function, self._seed = bind_seed(HASH_FUNCTIONS[function_id],
+                                                    int.from_bytes(seed, 'little'))
+        self._capacity = capacity
+        self._size = size
+
+    @classmethod
+    def build(cls, path: str, items, function: callable = mix_hash,
+              seed: int = None) -> "MappedHashMap":
+        """
+        Write a file holding the (key, value) pairs of an iterable, replacing path
+        only once the file is complete, and open it. A key that occurs more than
+        once keeps its last value.
+
+        :param path: path of the file
+        :param items: iterable of (key, value) tuples
+        :param function: hash function from a6_include.HASH_FUNCTIONS
+        :param seed: seed for a seeded hash function, random when omitted
+
+        :return: new MappedHashMap
+        """
+        items = list(items)
+        function_id = hash_function_id(function)
+        hash_function, seed = bind_seed(function, seed)
+
+        # keep the load factor below 0.5, so a probe always reaches an empty slot
+        capacity = cls._next_prime(cls, 2 * len(items) + 1)
+        slots = bytearray(SLOT.size * capacity)
+        # key of every used slot, to find duplicates without reading the heap back
+        slot_keys = [None] * capacity
+        size = 0
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            # the heap follows the slots, header and slots are written at the end
+            offset = HEADER.size + len(slots)
+            file.seek(offset)
+            for key, value in items:
+                hash_value = hash_function(key) & MASK_64
+                key_bytes = key.encode('utf-8', 'surrogatepass')
+
+                # quadratic probing to the slot of the key or the first empty one
+                index = hash_value % capacity
+                j = 0
+                new_index = index
+                while slot_keys[new_index] is not None and slot_keys[new_index] != key_bytes:
+                    j += 1
+                    new_index = (index + j ** 2) % capacity
+
+                if slot_keys[new_index] is None:
+                    key_offset = offset
+                    file.write(LENGTH.pack(len(key_bytes)))
+                    file.write(key_bytes)
+                    offset += LENGTH.size + len(key_bytes)
+                    slot_keys[new_index] = key_bytes
+                    size += 1
+                else:
+                    # a repeated key gets a new value, the old one stays unused in the heap
+                    key_offset = SLOT.unpack_from(slots, new_index * SLOT.size)[1]
+
+                value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                SLOT.pack_into(slots, new_index * SLOT.size, hash_value, key_offset, offset, OCCUPIED)
+                file.write(LENGTH.pack(len(value_bytes)))
+                file.write(value_bytes)
+                offset += LENGTH.size + len(value_bytes)
+
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, function_id, (seed or 0).to_bytes(16, 'little'),
+                                   capacity, size))
+            file.write(slots)
+        os.replace(temporary, path)
+        return cls(path)
+
+    def close(self) -> None:
+        """
+        Unmap the file. The map cannot be used afterwards.
+        """
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "MappedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str) -> int:
+        """
+        Return the heap offset of the value of key, or -1 if the key is not in the map.
+
+        :param key: key to search for
+
+        :return: (int) offset or -1
+        """
+        view = self._view
+        hash_value = self._hash_function(key) & MASK_64
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+
+        index = hash_value % self._capacity
+        j = 0
+        new_index = index
+        while True:
+            slot_hash, key_offset, value_offset, state = SLOT.unpack_from(
+                view, HEADER.size + new_index * SLOT.size)
+            if state == EMPTY:
+                return -1
+            if slot_hash == hash_value:
+                # compare the key where it lies in the mapping, without copying it
+                start = key_offset + LENGTH.size
+                if view[start:start + LENGTH.unpack_from(view, key_offset)[0]] == key_bytes:
+                    return value_offset
+            j += 1
+            new_index = (index + j ** 2) % self._capacity
+
+    def _value(self, offset: int) -> object:
+        """
+        Return the value stored at a heap offset.
+        """
+        start = offset + LENGTH.size
+        return pickle.loads(self._view[start:start + LENGTH.unpack_from(self._view, offset)[0]])
+
+    def get(self, key: str) -> object:
+        """
+        Return value associated with provided key. If not in the map, return None.
+
+        :param key: key to search for
+
+        :return: value of key
+        """
+        offset = self._find(key)
+        return self._value(offset) if offset >= 0 else None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determine if key exists in the hash map. Return true if it does, false otherwise.
+
+        :param: key to search for
+
+        :return: (bool) true if present, false otherwise
+        """
+        return self._find(key) >= 0
+
+    def table_load(self) -> float:
+        """
+        Determine current hash table load factor.
+
+        :return: (float) load factor
+        """
+        return self._size / self._capacity
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array where each index contains a tuple of each key/value pair stored in the hash map.
+
+        :return: Dynamic array
+        """
+        view = self._view
+        new_array = DynamicArray()
+        for i in range(self._capacity):
+            _, key_offset, value_offset, state = SLOT.unpack_from(view, HEADER.size + i * SLOT.size)
+            if state == OCCUPIED:
+                start = key_offset + LENGTH.size
+                key = str(view[start:start + LENGTH.unpack_from(view, key_offset)[0]], 'utf-8', 'surrogatepass')
+                new_array.append((key, self._value(value_offset)))
+        return new_array
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("\nbuild and open a mapped table")
+    print("-----------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'table.hmap')
+        pairs = [('key' + str(i), i * 10) for i in range(50)] + [('key7', 'seven')]
+        MappedHashMap.build(path, pairs).close()
+
+        with MappedHashMap(path) as m:
+            print(m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+            print(m.get('key0'), m.get('key49'), m.get('key7'), m.get('key50'))
+            print(m.contains_key('key12'), m.contains_key('nope'), m.get_keys_and_values().length())
@@ -1,85 +1,1408 @@
 # Description: Implementation of a hashmap with open addressing using quadratic probing.
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+import time
+import weakref
+from array import array
+
+from a6_include import (DynamicArray, DynamicArrayException, GenerationArray,
+                        HashEntry, bind_seed, dump_options, hash_function_1,
+                        hash_function_2, hash_keys, next_power_of_two,
+                        power_of_two_index, read_dump, write_dump)
+
+# current value passed to a compute function for a key that is not in the map
+_MISSING = object()
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, *,
+                 incremental_resize: bool = False,
+                 migration_batch: int = 4,
+                 tombstone_ratio: float = 0.25,
+                 power_of_two: bool = False,
+                 seed: int = None,
+                 shrink_load: float = None) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+
+        :param incremental_resize: if True, growing the table keeps the old bucket array
+            alongside the new one and moves a few buckets on every put/get/remove instead
+            of rehashing everything at once
+        :param migration_batch: number of old buckets moved per operation while an
+            incremental resize is in progress
+        :param tombstone_ratio: fraction of the buckets that may hold tombstones before
+            the table is rehashed at its current capacity to clear them
+        :param power_of_two: if True, capacities are powers of two, buckets are picked by
+            masking a mixed hash and probing follows triangular numbers, which visits
+            every bucket of such a table
+        :param seed: seed for the seeded hash functions in a6_include (fnv1a_hash,
+            siphash, mix_hash); a random seed is drawn for each map when omitted
+        :param shrink_load: when set, e.g. 0.125, a remove that leaves the load below it
+            shrinks the table to a load of 0.25, never below the initial capacity; at
+            most 0.125, half that target, so a shrink leaves the load well clear of both
+            thresholds and the table does not resize back and forth
+        """
+        if shrink_load is not None and not 0 < shrink_load <= 0.125:
+            raise ValueError("shrink_load must be greater than 0 and at most 0.125")
+        # clear empties the bucket array in O(1)
+        self._buckets = GenerationArray()
+
+        # capacity must be a prime number, or a power of two in power_of_two mode
+        self._power_of_two = power_of_two
+        self._capacity = self._round_capacity(capacity)
+        for _ in range(self._capacity):
+            self._buckets.append(None)
+
+        # seeded hash functions get their own seed per map so collisions cannot be predicted
+        self._hash_function, self._seed = bind_seed(function, seed)
+        self._size = 0
+
+        # lifetime resize counters reported by stats()
+        self._resizes = 0
+        self._resize_time = 0.0
+
+        # automatic shrinking on remove, down to the capacity the map started with
+        self._shrink_load = shrink_load
+        self._min_capacity = self._capacity
+
+        # tombstones are counted separately from empty buckets since they lengthen probes
+        self._tombstones = 0
+        self._tombstone_ratio = tombstone_ratio
+
+        # old table is only kept while an incremental resize is in progress,
+        # buckets below _migrate_index have already been moved to the new table
+        self._incremental_resize = incremental_resize
+        self._migration_batch = migration_batch
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        # live snapshots, and the bucket array the newest one iterates; the array is
+        # copied before it is written to and entries are replaced instead of changed
+        # while any snapshot is alive
+        self._snapshots = weakref.WeakSet()
+        self._shared_buckets = None
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        DO NOT CHANGE THIS METHOD IN ANY WAY
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        DO NOT CHANGE THIS METHOD IN ANY WAY
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        DO NOT CHANGE THIS METHOD IN ANY WAY
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        DO NOT CHANGE THIS METHOD IN ANY WAY
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        DO NOT CHANGE THIS METHOD IN ANY WAY
+        """
+        return self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Return number of tombstones in the table
+        """
+        return self._tombstones
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Return the capacity actually used for a requested capacity:
+        the next prime, or the next power of two in power_of_two mode.
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+    def _home(self, hash_value: int, capacity: int) -> int:
+        """
+        Return the first bucket probed for a hash in a table of the given capacity.
+        """
+        if self._power_of_two:
+            return power_of_two_index(hash_value, capacity)
+        return hash_value % capacity
+
+    def _probe(self, index: int, j: int, capacity: int) -> int:
+        """
+        Return bucket j of the probe sequence that starts at index.
+        Uses j ** 2 offsets for prime capacities and triangular numbers j * (j + 1) / 2
+        for powers of two.
+        """
+        if self._power_of_two:
+            return (index + ((j * j + j) >> 1)) & (capacity - 1)
+        return (index + j ** 2) % capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update key/value pair in hash map. If key exists, associated value replaced with the new value. If not in the hashmap, new key/value pair added.
+
+        :param key: key of the pair
+        :param value: value of pair
+        """
+        self._entry(key, value)
+
+    def _entry(self, key: str, value: object, compute=None) -> HashEntry:
+        """
+        Return the live entry for key after growing the table if needed, setting its
+        value and inserting key if it is missing.
+
+        :param key: key of the pair
+        :param value: value of pair
+        :param compute: function from the current value, _MISSING for a missing key,
+            to the value to store; used instead of value if given
+
+        :return: entry of key
+        """
+        # move a few buckets if an incremental resize is in progress
+        if self._old_buckets is not None:
+            self._migrate(self._migration_batch)
+
+        # determine if resizing necessary, snapshots need the table in one piece
+        if self.table_load() >= 0.5:
+            if self._incremental_resize and not self._snapshots:
+                self._start_migration(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity * 2)
+        elif (self._size + self._tombstones) / self._capacity >= 0.5:
+            # enough live entries fit, but tombstones fill the table, rehash in place
+            self._purge_tombstones()
+        # both checks run before the insert, so they leave a free bucket for it, but the
+        # table can end up with every bucket of some probe sequence in use; the probe
+        # loops stop after one cycle instead of relying on an empty bucket
+
+        # use has function to determine index
+        hash_value = self._hash_function(key)
+
+        # key may still live in the old table while migrating, update it in place
+        if self._old_buckets is not None:
+            entry = self._find_old(key, hash_value)
+            if entry is not None:
+                entry.value = value if compute is None else compute(entry.value)
+                return entry
+
+        return self._insert(key, value, hash_value, compute)
+
+    def _insert(self, key: str, value: object, hash_value: int, compute=None) -> HashEntry:
+        """
+        Update or insert key/value pair in the current table without checking the load.
+
+        :param key: key of the pair
+        :param value: value of pair
+        :param hash_value: (int) full hash of the key
+        :param compute: function from the current value, _MISSING for a missing key,
+            to the value to store; used instead of value if given
+
+        :return: entry of key
+        """
+        if self._buckets is self._shared_buckets:
+            self._unshare_buckets()
+
+        index = self._home(hash_value, self._capacity)
+
+        # quadratic probing to determine index, remembering the first tombstone passed
+        j = 0
+        new_index = index
+        free_index = None
+        while self._buckets[new_index] is not None and j < self._capacity:
+            entry = self._buckets[new_index]
+            if entry.is_tombstone:
+                if free_index is None:
+                    free_index = new_index
+            elif entry.hash_value == hash_value and entry.key == key:
+                if compute is not None:
+                    value = compute(entry.value)
+                # a snapshot may still see this entry, the caller gets its own copy to change
+                if self._snapshots:
+                    entry = HashEntry(entry.key, entry.value, entry.hash_value)
+                    self._buckets[new_index] = entry
+                # update value if the key is found
+                entry.value = value
+                return entry
+            j += 1
+            new_index = self._probe(index, j, self._capacity)
+
+        if free_index is None and self._buckets[new_index] is not None:
+            # every bucket of the probe sequence is in use, make room and try again
+            self.resize_table(self._capacity * 2)
+            return self._insert(key, value, hash_value, compute)
+
+        # the new value is known before the map changes, so a failing compute leaves no key behind
+        if compute is not None:
+            value = compute(_MISSING)
+
+        # key is absent, reuse the first tombstone on its probe path if there was one
+        if free_index is not None:
+            new_index = free_index
+            self._tombstones -= 1
+
+        # insert new key, value pair
+        entry = HashEntry(key, value, hash_value)
+        self._buckets[new_index] = entry
+        self._size += 1
+        return entry
+
+    def _unshare_buckets(self) -> None:
+        """
+        Give the map its own copy of the bucket array a snapshot iterates, unless
+        every snapshot has been released since.
+        """
+        if self._snapshots:
+            self._buckets = self._buckets.copy()
+        self._shared_buckets = None
+
+    def _find_old(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Return the live entry for key in the old table that has not been migrated yet, or None.
+
+        :param key: key to search for
+        :param hash_value: (int) full hash of the key
+
+        :return: entry or None
+        """
+        index = self._home(hash_value, self._old_capacity)
+
+        # the old table is at a load of 0.5 or more, where a quadratic probe sequence in
+        # a prime table can cycle through occupied buckets without reaching an empty one
+        j = 0
+        new_index = index
+        while self._old_buckets[new_index] is not None and j < self._old_capacity:
+            entry = self._old_buckets[new_index]
+            if entry.hash_value == hash_value and entry.key == key and not entry.is_tombstone:
+                # buckets below the migration index have already been moved
+                if new_index < self._migrate_index:
+                    return None
+                return entry
+            j += 1
+            new_index = self._probe(index, j, self._old_capacity)
+
+        return None
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Begin an incremental resize. The current table becomes the old table and a new,
+        empty table is allocated; entries are moved over by _migrate.
+
+        :param new_capacity: (int) new capacity of table
+        """
+        # a previous migration must be done before the table can grow again
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        start = time.perf_counter()
+        self._resizes += 1
+
+        new_capacity = self._round_capacity(new_capacity)
+
+        # allocate in one step so starting the resize stays cheap
+        new_buckets = GenerationArray([None] * new_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+        self._buckets = new_buckets
+        self._capacity = new_capacity
+        # tombstones of the old table are left behind with it
+        self._tombstones = 0
+        self._resize_time += time.perf_counter() - start
+
+    def _migrate(self, count: int) -> None:
+        """
+        Move up to count buckets from the old table to the new one. Drops the old table
+        once every bucket has been moved.
+
+        :param count: (int) maximum number of old buckets to move
+        """
+        start = time.perf_counter()
+        stop = min(self._migrate_index + count, self._old_capacity)
+        for i in range(self._migrate_index, stop):
+            entry = self._old_buckets[i]
+            if entry is not None and not entry.is_tombstone:
+                # key cannot be live in the new table, place it in the first free slot
+                index = self._home(entry.hash_value, self._capacity)
+                j = 0
+                new_index = index
+                while self._buckets[new_index] is not None and not self._buckets[new_index].is_tombstone:
+                    j += 1
+                    new_index = self._probe(index, j, self._capacity)
+                if self._buckets[new_index] is not None:
+                    self._tombstones -= 1
+                self._buckets[new_index] = entry
+        self._migrate_index = stop
+
+        if self._migrate_index >= self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            self._migrate_index = 0
+        self._resize_time += time.perf_counter() - start
+
+    def _purge_tombstones(self) -> None:
+        """
+        Rehash the entries at the current capacity to drop the tombstones. With
+        incremental_resize this starts a migration into a fresh table of the same
+        capacity instead, unless a snapshot needs the table in one piece.
+        """
+        if self._incremental_resize and not self._snapshots:
+            self._start_migration(self._capacity)
+        else:
+            self.resize_table(self._capacity)
+
+    def migrate_step(self, count: int) -> bool:
+        """
+        Move up to count buckets of an incremental resize in progress to the new
+        table, so a caller can finish the resize in chunks of its own choosing.
+
+        :param count: (int) maximum number of old buckets to move, 0 only reports
+
+        :return: (bool) True if buckets are still waiting to be moved
+        """
+        if self._old_buckets is not None:
+            self._migrate(count)
+        return self._old_buckets is not None
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the underlying table. Transfer key/value pairs to new table (all non-tombstone has table links must be rehashed).
+
+        :param new_capacity: (int) new capacity of table
+        """
+        if new_capacity < self._size:
+            return
+
+        # finish any incremental resize so all entries are in one table
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        start = time.perf_counter()
+        self._rebuild(new_capacity)
+        self._resize_time += time.perf_counter() - start
+
+    def _rebuild(self, new_capacity: int) -> None:
+        """
+        Rehash every live entry into a new table of the given capacity, growing again
+        if the entries do not fit under the load limit.
+
+        :param new_capacity: (int) new capacity of table
+        """
+        self._resizes += 1
+
+        # ensure new capcity is prime, or a power of two
+        new_capacity = self._round_capacity(new_capacity)
+
+        # create new array
+        new_buckets = GenerationArray()
+        for _ in range(new_capacity):
+            new_buckets.append(None)
+
+        # store old array of lists for rehashing
+        old_buckets = self._buckets
+
+        # update to the new buckets and capacity
+        self._buckets = new_buckets
+        self._capacity = new_capacity
+
+        # reset size, will be updated during reinsertion, tombstones are not carried over
+        self._size = 0
+        self._tombstones = 0
+
+        # rehash into new hashmap with the stored hashes, growing again if the new capacity is too small
+        for i in range(old_buckets.length()):
+            entry = old_buckets[i]
+            if entry is not None and not entry.is_tombstone:
+                if self.table_load() >= 0.5:
+                    self._rebuild(self._capacity * 2)
+                self._insert(entry.key, entry.value, entry.hash_value)
+
+    def table_load(self) -> float:
+        """
+        Determine current hash table load factor.
+
+        :return: (float) load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Return number of empty buckets in the hash table.
+
+        :return: (int) number of empty buckets
+        """
+        empty = 0
+
+        # iterate through hash table to count empty buckets
+        for i in range(self._capacity):
+            if self._buckets[i] is None or self._buckets[i].is_tombstone:
+                empty +=1
+
+        return empty
+
+    def get(self, key: str) -> object:
+        """
+        Return value associated with provided key. If not in the map, return None.
+
+        :param key: key to search for
+
+        :return: value of key
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._migration_batch)
+
+        # determine hashed index
+        hash_value = self._hash_function(key)
+        index = self._home(hash_value, self._capacity)
+
+        # quadratic probing to determine index, the load check runs before an insert, so a
+        # prime table can fill every bucket of a sequence; stop after one full cycle
+        j = 0
+        new_index = index
+        while self._buckets[new_index] is not None and j < self._capacity:
+            if (self._buckets[new_index].hash_value == hash_value and self._buckets[new_index].key == key
+                    and not self._buckets[new_index].is_tombstone):
+                # return value if non tombstone key found
+                return self._buckets[new_index].value
+            j += 1
+            new_index = self._probe(index, j, self._capacity)
+
+        # key may not have been migrated yet
+        if self._old_buckets is not None:
+            entry = self._find_old(key, hash_value)
+            if entry is not None:
+                return entry.value
+
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determine if key exists in the hash map. Return true if it does, false otherwise.
+
+        :param: key to search for
+
+        :return: (bool) true if present, false otherwise
+        """
+        # false for empty hash map
+        if self._size == 0:
+            return False
+
+        # determine hashed index
+        hash_value = self._hash_function(key)
+        index = self._home(hash_value, self._capacity)
+
+        # quadratic probing to determine index
+        j = 0
+        new_index = index
+        while self._buckets[new_index] is not None and j < self._capacity:
+            if (self._buckets[new_index].hash_value == hash_value and self._buckets[new_index].key == key
+                    and not self._buckets[new_index].is_tombstone):
+                # return true if non tombstone key located
+                return True
+            j += 1
+            new_index = self._probe(index, j, self._capacity)
+
+        # key may not have been migrated yet
+        if self._old_buckets is not None:
+            return self._find_old(key, hash_value) is not None
+
+        return False
+
+    def remove(self, key: str) -> None:
+        """
+        Remove given key and associated value from the has map. Does nothing if no such pair exists.
+        Without incremental_resize, the remove that triggers the rehash clearing the
+        tombstones takes O(capacity) time; with it, the rehash is moved a few buckets
+        per operation.
+
+        :param key: key to remove
+        """
+        self._pop_entry(key)
+
+    def _pop_entry(self, key: str) -> HashEntry:
+        """
+        Remove key in a single probe sequence and return its entry, or None if the key is not in the map.
+
+        :param key: key to remove
+
+        :return: removed entry or None
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._migration_batch)
+
+        # determine hashed index
+        hash_value = self._hash_function(key)
+        index = self._home(hash_value, self._capacity)
+
+        # quadratic probing to determine index
+        j = 0
+        new_index = index
+        while self._buckets[new_index] is not None and j < self._capacity:
+            entry = self._buckets[new_index]
+            if entry.hash_value == hash_value and entry.key == key and not entry.is_tombstone:
+                # update tombstone status and reduce size, on a copy if a snapshot may see the entry
+                if self._snapshots:
+                    if self._buckets is self._shared_buckets:
+                        self._unshare_buckets()
+                    tombstone = HashEntry(entry.key, entry.value, entry.hash_value)
+                    tombstone.is_tombstone = True
+                    self._buckets[new_index] = tombstone
+                else:
+                    entry.is_tombstone = True
+                self._size -= 1
+                self._tombstones += 1
+
+                # shrink a sparse table, or rehash at the same capacity once
+                # tombstones take up too much of it
+                if not self._shrink_if_sparse() and self._tombstones >= self._tombstone_ratio * self._capacity:
+                    self._purge_tombstones()
+                return entry
+            j += 1
+            new_index = self._probe(index, j, self._capacity)
+
+        # key may not have been migrated yet
+        if self._old_buckets is not None:
+            entry = self._find_old(key, hash_value)
+            if entry is not None:
+                entry.is_tombstone = True
+                self._size -= 1
+                self._shrink_if_sparse()
+                return entry
+
+        return None
+
+    def _shrink_if_sparse(self) -> bool:
+        """
+        Shrink the table if automatic shrinking is on and the load has fallen below
+        shrink_load. Return True if the table was resized. With incremental_resize the
+        entries are moved into the smaller table a few buckets per operation, and no
+        shrink starts while a resize is still in progress.
+        """
+        if self._shrink_load is None or self._size >= self._shrink_load * self._capacity:
+            return False
+        new_capacity = self._round_capacity(max(4 * self._size, self._min_capacity))
+        if new_capacity >= self._capacity:
+            return False
+        if self._incremental_resize and not self._snapshots:
+            if self._old_buckets is not None:
+                return False
+            self._start_migration(new_capacity)
+        else:
+            self.resize_table(new_capacity)
+        return True
+
+    def shrink_to_fit(self) -> None:
+        """
+        Shrink the table to the smallest capacity that holds the entries at a load
+        of 0.25, half the load at which it grows, dropping every tombstone.
+        A table that is already that small is only rehashed if it has tombstones.
+        """
+        new_capacity = self._round_capacity(max(4 * self._size, 1))
+        if new_capacity < self._capacity or self._tombstones:
+            self.resize_table(min(new_capacity, self._capacity))
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array where each index contains a tuple of each key/value pair stored in the hash map.
+
+        :return: Dynamic array
+        """
+        # create new array
+        new_array = DynamicArray()
+
+        # iterate through hash map to collect non-tombstone entries
+        for i in range(self._capacity):
+            if self._buckets[i] is not None and not self._buckets[i].is_tombstone:
+                # append as a tuple (key, value)
+                new_array.append((self._buckets[i].key, self._buckets[i].value))
+
+        # include entries that have not been migrated yet
+        if self._old_buckets is not None:
+            for i in range(self._migrate_index, self._old_capacity):
+                if self._old_buckets[i] is not None and not self._old_buckets[i].is_tombstone:
+                    new_array.append((self._old_buckets[i].key, self._old_buckets[i].value))
+
+        return new_array
+
+    def clear(self) -> None:
+        """
+        Clears contents of the hash map in O(1). Does not change capacity.
+        """
+        # start a new generation of buckets, old entries read as None and are released
+        # as their buckets are written again; a live snapshot keeps its array as it is
+        if self._buckets is self._shared_buckets and self._snapshots:
+            self._buckets = GenerationArray([None] * self._capacity)
+        else:
+            self._buckets.reset()
+        self._shared_buckets = None
+        # drop any table still being migrated
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+        # reset size
+        self._size = 0
+        self._tombstones = 0
+
+    def __iter__(self) -> "HashMapSnapshot":
+        """
+        Create iterator for loop. Every loop gets its own snapshot of the map.
+        """
+        return self.snapshot()
+
+    def snapshot(self) -> "HashMapSnapshot":
+        """
+        Return an iterator over the live entries of the map as they are now. Writes
+        made while it is in use do not show up in it and do not disturb it; the map
+        copies its bucket array on the next write instead and replaces the entries it
+        changes. Taking the snapshot finishes an incremental resize if one is running.
+
+        :return: snapshot iterator
+        """
+        # iterate a single table
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+        self._shared_buckets = self._buckets
+        return HashMapSnapshot(self._buckets, self._capacity, self._snapshots)
+
+    # ------------------------------------------------------------------ #
+
+    def upsert(self, key: str, fn, default: object = None) -> object:
+        """
+        Replace the value of key with fn(value) in a single probe sequence. A missing
+        key is treated as holding default and is only inserted once fn returns.
+
+        :param key: key of the pair
+        :param fn: function from the current value to the new value
+        :param default: value fn receives when key is not in the map
+
+        :return: new value of key
+        """
+        return self._entry(key, None, lambda current: fn(default if current is _MISSING else current)).value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Return the value of key, inserting key with value default first if it is missing.
+
+        :param key: key to search for
+        :param default: value stored for a missing key
+
+        :return: value of key
+        """
+        return self._entry(key, None, lambda current: default if current is _MISSING else current).value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Add delta to the value of key, counting a missing key as 0.
+
+        :param key: key of the counter
+        :param delta: (int) amount to add
+
+        :return: (int) new value of key
+        """
+        return self._entry(key, None, lambda current: (0 if current is _MISSING else current) + delta).value
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Remove key and return its value, or default if the key is not in the map.
+
+        :param key: key to remove
+        :param default: value returned for a missing key
+
+        :return: removed value or default
+        """
+        entry = self._pop_entry(key)
+        return entry.value if entry is not None else default
+
+    def _lookup(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Return the live entry for key in the current table, or in the part of the old
+        table that has not been migrated yet. Return None if the key is not in the map.
+
+        :param key: key to search for
+        :param hash_value: (int) full hash of the key
+
+        :return: entry or None
+        """
+        index = self._home(hash_value, self._capacity)
+        j = 0
+        new_index = index
+        while self._buckets[new_index] is not None and j < self._capacity:
+            entry = self._buckets[new_index]
+            if entry.hash_value == hash_value and entry.key == key and not entry.is_tombstone:
+                return entry
+            j += 1
+            new_index = self._probe(index, j, self._capacity)
+
+        if self._old_buckets is not None:
+            return self._find_old(key, hash_value)
+        return None
+
+    @classmethod
+    def from_items(cls, items, expected_size: int = None,
+                   function=hash_function_1, **options) -> "HashMap":
+        """
+        Build a new map from an iterable of (key, value) pairs. The table is sized
+        once for expected_size entries (the number of items by default) so it does
+        not grow while loading.
+
+        :param items: iterable of (key, value) tuples
+        :param expected_size: (int) number of entries the map should hold without resizing
+        :param function: hash function
+        :param options: other keyword arguments for HashMap
+
+        :return: new HashMap
+        """
+        items = list(items)
+        if expected_size is None:
+            expected_size = len(items)
+        m = cls(2 * expected_size + 1, function, **options)
+        m.put_many(items)
+        return m
+
+    def put_many(self, items) -> None:
+        """
+        Put every (key, value) pair of an iterable. Keys are hashed in one batch and
+        the table is resized at most once, up front, for the final count.
+
+        :param items: iterable of (key, value) tuples
+        """
+        items = list(items)
+        hashes = hash_keys(self._hash_function, [key for key, _ in items])
+
+        # all entries must be in one table before inserting without load checks
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        # size the table once, assuming every key is new, so the load stays below 0.5
+        needed = self._size + len(items)
+        if 2 * (needed + self._tombstones) >= self._capacity:
+            self.resize_table(2 * needed + 1)
+
+        for (key, value), hash_value in zip(items, hashes):
+            self._insert(key, value, hash_value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array with the value of every key, None for missing keys.
+
+        :param keys: iterable of keys
+
+        :return: Dynamic array of values in the order of keys
+        """
+        keys = list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            entry = self._lookup(key, hash_value)
+            values.append(entry.value if entry is not None else None)
+        return values
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array telling for every key whether it is in the map.
+
+        :param keys: iterable of keys
+
+        :return: Dynamic array of booleans in the order of keys
+        """
+        keys = list(keys)
+        found = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            found.append(self._lookup(key, hash_value) is not None)
+        return found
+
+    def dump(self, target) -> None:
+        """
+        Write the map in a compact binary format that load reads back without
+        rehashing: capacity, hash function id and seed, and every entry and
+        tombstone with its bucket index and stored hash. The hash function must be
+        one of a6_include.HASH_FUNCTIONS.
+
+        :param target: file path or binary file object
+        """
+        # finish any incremental resize so all entries are in one table
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        indexes, hashes, keys, values = [], [], [], []
+        tombstone_indexes, tombstone_hashes = [], []
+        for i in range(self._capacity):
+            entry = self._buckets[i]
+            if entry is None:
+                continue
+            # tombstones are kept, probe sequences run through them
+            if entry.is_tombstone:
+                tombstone_indexes.append(i)
+                tombstone_hashes.append(entry.hash_value)
+            else:
+                indexes.append(i)
+                hashes.append(entry.hash_value)
+                keys.append(entry.key)
+                values.append(entry.value)
+        write_dump(target, 'oa', self._hash_function, self._seed, self._capacity,
+                   self._power_of_two, indexes, hashes, keys, values,
+                   tombstone_indexes, tombstone_hashes)
+
+    @classmethod
+    def load(cls, source, **options) -> "HashMap":
+        """
+        Read a map written by dump. Entries go straight back into the buckets they
+        were dumped from, with their stored hashes; no key is hashed again.
+
+        :param source: file path or binary file object
+        :param options: other keyword arguments for HashMap, e.g. incremental_resize
+
+        :return: new HashMap
+        """
+        dump = read_dump(source, 'oa')
+        m = cls(dump['capacity'], dump['function'], **dump_options(dump, options))
+
+        buckets = [None] * m._capacity
+        indexes, hashes, keys, values = dump['indexes'], dump['hashes'], dump['keys'], dump['values']
+        for i in range(len(keys)):
+            buckets[indexes[i]] = HashEntry(keys[i], values[i], hashes[i])
+        for index, hash_value in zip(dump['tombstone_indexes'], dump['tombstone_hashes']):
+            tombstone = HashEntry(None, None, hash_value)
+            tombstone.is_tombstone = True
+            buckets[index] = tombstone
+
+        m._buckets = GenerationArray(buckets)
+        m._size = len(keys)
+        m._tombstones = len(dump['tombstone_indexes'])
+        return m
+
+    def stats(self, full: bool = True) -> dict:
+        """
+        Return statistics about the table. Size, capacity, load, tombstones and the resize
+        counters are kept as the map changes and cost O(1); with full=True the table is
+        also walked for the probe length histogram, clustering and expected lookup costs.
+        While an incremental resize is in progress only the new table is walked.
+
+        :param full: (bool) include the values that need a walk over the table
+
+        :return: (dict) with keys size, capacity, load, tombstones, resizes, resize_time,
+            migrating and, when full, probe_lengths (probes needed to find an entry ->
+            number of entries), longest_cluster (longest run of non-empty buckets),
+            expected_hit_probes and expected_miss_probes (buckets visited per lookup)
+        """
+        stats = {'size': self._size,
+                 'capacity': self._capacity,
+                 'load': self.table_load(),
+                 'tombstones': self._tombstones,
+                 'resizes': self._resizes,
+                 'resize_time': self._resize_time,
+                 'migrating': self._old_buckets is not None}
+        if not full:
+            return stats
+
+        buckets, capacity = self._buckets, self._capacity
+
+        # probes needed to reach every live entry from its home bucket
+        probe_lengths = {}
+        entries = 0
+        total = 0
+        for i in range(capacity):
+            entry = buckets[i]
+            if entry is None or entry.is_tombstone:
+                continue
+            index = self._home(entry.hash_value, capacity)
+            j = 0
+            while self._probe(index, j, capacity) != i:
+                j += 1
+            probe_lengths[j + 1] = probe_lengths.get(j + 1, 0) + 1
+            entries += 1
+            total += j + 1
+
+        # a miss starting at any bucket probes until it reaches an empty bucket, or
+        # for capacity buckets when its sequence cycles through occupied ones only
+        miss_total = 0
+        for index in range(capacity):
+            j = 0
+            while j < capacity and buckets[self._probe(index, j, capacity)] is not None:
+                j += 1
+            miss_total += min(j + 1, capacity)
+
+        # longest run of occupied buckets, tombstones included, wrapping around the end
+        longest = run = 0
+        for i in range(2 * capacity):
+            if buckets[i % capacity] is None:
+                run = 0
+            else:
+                run += 1
+                longest = max(longest, run)
+
+        stats['probe_lengths'] = dict(sorted(probe_lengths.items()))
+        stats['longest_cluster'] = min(longest, capacity)
+        stats['expected_hit_probes'] = total / entries if entries else 0.0
+        stats['expected_miss_probes'] = miss_total / capacity
+        return stats
+
+
+class HashMapSnapshot:
+    """
+    Iterator over the live entries of a HashMap as they were when it was created.
+    Holds on to the bucket array of that moment, which the map no longer writes to.
+    """
+
+    def __init__(self, buckets: DynamicArray, capacity: int, registry: weakref.WeakSet) -> None:
+        """
+        Initialize the iterator and register it with the map's live snapshots.
+
+        :param buckets: bucket array to iterate
+        :param capacity: (int) number of buckets
+        :param registry: the map's set of live snapshots
+        """
+        self._buckets = buckets
+        self._capacity = capacity
+        self._index = 0
+        self._registry = registry
+        registry.add(self)
+
+    def __iter__(self) -> "HashMapSnapshot":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> HashEntry:
+        """
+        Return the next live entry of the snapshot.
+        """
+        while self._index < self._capacity:
+            current_entry = self._buckets[self._index]
+            self._index += 1
+            # return next entry
+            if current_entry is not None and not current_entry.is_tombstone:
+                return current_entry
+        self.close()
+        raise StopIteration
+
+    def close(self) -> None:
+        """
+        Release the snapshot so the map stops copying entries for it. Happens
+        automatically when iteration finishes or the snapshot is garbage collected.
+        """
+        self._registry.discard(self)
+        self._buckets = None
+        self._capacity = 0
+
+
+# slot states for CompactHashMap
+_EMPTY = 0
+_OCCUPIED = 1
+_TOMBSTONE = 2
+
+# stored hashes must fit the signed 64-bit array used by CompactHashMap
+_HASH_MASK = (1 << 63) - 1
+
+
+class CompactHashMap:
+    """
+    Open addressing hash map with the same interface as HashMap, storing the table
+    in parallel arrays instead of one HashEntry object per bucket: hashes in an
+    array('q'), keys and values in flat lists and the state of every slot in a bytearray.
+
+    There is no incremental resize, so the remove that brings the tombstones to
+    tombstone_ratio of the capacity rehashes the whole table and takes O(capacity)
+    time. That cost is spread over the removes that made the tombstones, so remove
+    is O(1) amortised but not in the worst case.
+    """
+
+    # capacity is kept prime the same way as in HashMap
+    _next_prime = HashMap._next_prime
+    _is_prime = staticmethod(HashMap._is_prime)
+
+    def __init__(self, capacity: int, function, *, tombstone_ratio: float = 0.25) -> None:
+        """
+        Initialize new CompactHashMap that uses
+        quadratic probing for collision resolution
+
+        :param tombstone_ratio: fraction of the slots that may hold tombstones before
+            the table is rehashed at its current capacity to clear them
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+        self._tombstone_ratio = tombstone_ratio
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the slot arrays with empty ones of the given capacity.
+
+        :param capacity: (int) number of slots
+        """
+        self._hashes = array('q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._states = bytearray(capacity)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as HashMap
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == _EMPTY:
+                entry = None
+            else:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+                entry.is_tombstone = self._states[i] == _TOMBSTONE
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Return number of tombstones in the table
+        """
+        return self._tombstones
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """
+        Return the slot holding key, or -1 if the key is not in the map.
+
+        :param key: key to search for
+        :param hash_value: (int) masked hash of the key
+
+        :return: (int) slot index or -1
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash_value % capacity
+
+        # quadratic probing until an empty slot ends the probe sequence, or one full
+        # cycle has passed, since the slots a sequence reaches can all be in use
+        j = 0
+        new_index = index
+        while states[new_index] != _EMPTY and j < capacity:
+            if (states[new_index] == _OCCUPIED and hashes[new_index] == hash_value
+                    and keys[new_index] == key):
+                return new_index
+            j += 1
+            new_index = (index + j ** 2) % capacity
+
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update key/value pair in hash map. If key exists, associated value replaced with the new value. If not in the hashmap, new key/value pair added.
+
+        :param key: key of the pair
+        :param value: value of pair
         """
-        Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        # determine if resizing necessary, tombstones take up slots too; this leaves a
+        # free slot for the insert, not an empty slot at the end of every probe sequence
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+        elif (self._size + self._tombstones) / self._capacity >= 0.5:
+            self.resize_table(self._capacity)
+
+        self._insert(key, value, self._hash_function(key) & _HASH_MASK)
+
+    def _insert(self, key: str, value: object, hash_value: int) -> None:
         """
-        self._buckets = DynamicArray()
+        Update or insert key/value pair without checking the load.
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        :param key: key of the pair
+        :param value: value of pair
+        :param hash_value: (int) masked hash of the key
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash_value % capacity
 
-        self._hash_function = function
+        # quadratic probing to determine index, remembering the first tombstone passed
+        j = 0
+        new_index = index
+        free_index = -1
+        while states[new_index] != _EMPTY and j < capacity:
+            if states[new_index] == _TOMBSTONE:
+                if free_index < 0:
+                    free_index = new_index
+            elif hashes[new_index] == hash_value and keys[new_index] == key:
+                # update value if the key is found
+                self._values[new_index] = value
+                return
+            j += 1
+            new_index = (index + j ** 2) % capacity
+
+        # key is absent, reuse the first tombstone on its probe path if there was one
+        if free_index >= 0:
+            new_index = free_index
+            self._tombstones -= 1
+        elif states[new_index] != _EMPTY:
+            # every slot of the probe sequence is in use, make room and try again
+            self.resize_table(capacity * 2)
+            self._insert(key, value, hash_value)
+            return
+
+        states[new_index] = _OCCUPIED
+        hashes[new_index] = hash_value
+        keys[new_index] = key
+        self._values[new_index] = value
+        self._size += 1
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the underlying table, rehashing live entries with their stored hashes.
+
+        :param new_capacity: (int) new capacity of table
+        """
+        if new_capacity < self._size:
+            return
+
+        # ensure new capcity is prime
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # keep the old arrays for rehashing
+        old_capacity = self._capacity
+        old_states, old_hashes = self._states, self._hashes
+        old_keys, old_values = self._keys, self._values
+
+        self._capacity = new_capacity
+        self._allocate(new_capacity)
         self._size = 0
+        self._tombstones = 0
 
-    def __str__(self) -> str:
+        # rehash into new arrays, growing again if the new capacity is too small
+        for i in range(old_capacity):
+            if old_states[i] == _OCCUPIED:
+                if self.table_load() >= 0.5:
+                    self.resize_table(self._capacity * 2)
+                self._insert(old_keys[i], old_values[i], old_hashes[i])
+
+    def table_load(self) -> float:
         """
-        Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Determine current hash table load factor.
+
+        :return: (float) load factor
         """
-        out = ''
-        for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
-        return out
+        return self._size / self._capacity
 
-    def _next_prime(self, capacity: int) -> int:
+    def empty_buckets(self) -> int:
         """
-        Increment from given number to find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Return number of empty buckets in the hash table, tombstones included.
+
+        :return: (int) number of empty buckets
         """
-        if capacity % 2 == 0:
-            capacity += 1
+        return self._capacity - self._size
 
-        while not self._is_prime(capacity):
-            capacity += 2
+    def get(self, key: str) -> object:
+        """
+        Return value associated with provided key. If not in the map, return None.
 
-        return capacity
+        :param key: key to search for
 
-    @staticmethod
-    def _is_prime(capacity: int) -> bool:
+        :return: value of key
         """
-        Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        index = self._find(key, self._hash_function(key) & _HASH_MASK)
+        return self._values[index] if index >= 0 else None
+
+    def contains_key(self, key: str) -> bool:
         """
-        if capacity == 2 or capacity == 3:
-            return True
+        Determine if key exists in the hash map. Return true if it does, false otherwise.
 
-        if capacity == 1 or capacity % 2 == 0:
+        :param: key to search for
+
+        :return: (bool) true if present, false otherwise
+        """
+        if self._size == 0:
             return False
+        return self._find(key, self._hash_function(key) & _HASH_MASK) >= 0
 
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
+    def remove(self, key: str) -> None:
+        """
+        Remove given key and associated value from the has map. Does nothing if no such pair exists.
+        Takes O(capacity) time when it triggers the rehash that clears the tombstones.
 
-        return True
+        :param key: key to remove
+        """
+        index = self._find(key, self._hash_function(key) & _HASH_MASK)
+        if index < 0:
+            return
+
+        # mark the slot as a tombstone and release the key and value
+        self._states[index] = _TOMBSTONE
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+        # rehash at the same capacity once tombstones take up too much of the table
+        if self._tombstones >= self._tombstone_ratio * self._capacity:
+            self.resize_table(self._capacity)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array where each index contains a tuple of each key/value pair stored in the hash map.
+
+        :return: Dynamic array
+        """
+        new_array = DynamicArray()
+        for i in range(self._capacity):
+            if self._states[i] == _OCCUPIED:
+                new_array.append((self._keys[i], self._values[i]))
+        return new_array
+
+    def clear(self) -> None:
+        """
+        Clears contents of the hash map. Does not change capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def __iter__(self):
+        """
+        Iterate over the live entries as HashEntry objects, as HashMap does.
+        The entries are built on the fly and are not stored in the table.
+        """
+        for i in range(self._capacity):
+            if self._states[i] == _OCCUPIED:
+                yield HashEntry(self._keys[i], self._values[i], self._hashes[i])
+
+
+class RobinHoodHashMap:
+    """
+    Open addressing hash map using Robin Hood hashing with linear probing.
+    An entry's distance from its home slot is derived from its stored hash. On insert,
+    an entry that is further from home takes the slot of one that is closer, which keeps
+    probe lengths even and lets lookups stop early. Removal shifts the following
+    entries back instead of leaving tombstones, so the table can run at a higher load.
+    """
+
+    # capacity is kept prime the same way as in HashMap
+    _next_prime = HashMap._next_prime
+    _is_prime = staticmethod(HashMap._is_prime)
+
+    def __init__(self, capacity: int, function, *, load_factor: float = 0.85) -> None:
+        """
+        Initialize new RobinHoodHashMap
+
+        :param load_factor: (float) highest load before the table doubles
+        """
+        self._buckets = DynamicArray()
+
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        for _ in range(self._capacity):
+            self._buckets.append(None)
+
+        self._hash_function = function
+        self._size = 0
+        self._load_factor = load_factor
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
 
     def get_size(self) -> int:
         """
         Return size of map
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
         return self._size
 
     def get_capacity(self) -> int:
         """
         Return capacity of map
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
         return self._capacity
 
     # ------------------------------------------------------------------ #
 
+    def _distance(self, entry: HashEntry, index: int) -> int:
+        """
+        Return how far the entry stored at index is from its home slot.
+
+        :param entry: entry stored at index
+        :param index: (int) slot of the entry
+
+        :return: (int) probe distance
+        """
+        return (index - entry.hash_value % self._capacity) % self._capacity
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """
+        Return the slot holding key, or -1 if the key is not in the map.
+        The search stops as soon as it reaches an entry closer to home than the
+        current probe distance, since the key would have displaced that entry.
+
+        :param key: key to search for
+        :param hash_value: (int) full hash of the key
+
+        :return: (int) slot index or -1
+        """
+        index = hash_value % self._capacity
+        distance = 0
+        while True:
+            entry = self._buckets[index]
+            if entry is None or self._distance(entry, index) < distance:
+                return -1
+            if entry.hash_value == hash_value and entry.key == key:
+                return index
+            index = (index + 1) % self._capacity
+            distance += 1
+
     def put(self, key: str, value: object) -> None:
         """
         Update key/value pair in hash map. If key exists, associated value replaced with the new value. If not in the hashmap, new key/value pair added.
@@ -87,71 +1410,62 @@ class HashMap:
         :param key: key of the pair
         :param value: value of pair
         """
+        hash_value = self._hash_function(key)
+        index = self._find(key, hash_value)
+        if index >= 0:
+            self._buckets[index].value = value
+            return
+
         # determine if resizing necessary
-        if self.table_load() >= 0.5:
+        if (self._size + 1) / self._capacity > self._load_factor:
             self.resize_table(self._capacity * 2)
 
-        # use has function to determine index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
+        self._insert(HashEntry(key, value, hash_value))
 
-        # quadratic probing to determine index
-        j = 0
-        new_index = index
-        while self._buckets[new_index] is not None:
-            if not self._buckets[new_index].is_tombstone and self._buckets[new_index].key == key:
-                # update value if the key is found and not a tombstone
-                self._buckets[new_index].value = value
-                return   
-            if self._buckets[new_index].is_tombstone and self._buckets[new_index].key == key:
-                # reactivate tombstone entry and update value
-                self._buckets[new_index].is_tombstone = False
-                self._buckets[new_index].value = value
+    def _insert(self, entry: HashEntry) -> None:
+        """
+        Place an entry whose key is not in the map, displacing entries that are
+        closer to their home slot than the one being placed.
+
+        :param entry: entry to insert
+        """
+        index = entry.hash_value % self._capacity
+        distance = 0
+        while True:
+            current = self._buckets[index]
+            if current is None:
+                self._buckets[index] = entry
                 self._size += 1
                 return
-            j += 1
-            new_index = (index + j ** 2) % self._capacity
 
+            # the poorer entry takes the slot and the richer one moves on
+            current_distance = self._distance(current, index)
+            if current_distance < distance:
+                self._buckets[index] = entry
+                entry, distance = current, current_distance
 
-        # insert new key, value pair in an empty slot
-        self._buckets[new_index] = HashEntry(key, value)
-        self._size += 1
+            index = (index + 1) % self._capacity
+            distance += 1
 
-    
     def resize_table(self, new_capacity: int) -> None:
         """
-        Change the capacity of the underlying table. Transfer key/value pairs to new table (all non-tombstone has table links must be rehashed).
+        Change the capacity of the underlying table, rehashing entries with their stored hashes.
+        The capacity is raised if the entries would not fit under the load factor.
 
         :param new_capacity: (int) new capacity of table
         """
-        if new_capacity < self._size:
-            return
-        
-        # ensure new capcity is prime
-        if self._is_prime(new_capacity):
-            new_capacity = new_capacity
-        else:
+        new_capacity = max(new_capacity, int(self._size / self._load_factor) + 1)
+        if not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
 
-        # create new array 
-        new_buckets = DynamicArray()
-        for _ in range(new_capacity):
-            new_buckets.append(None)
-
-        # store old array of lists for rehashing
         old_buckets = self._buckets
-        
-        # update to the new buckets and capacity
-        self._buckets = new_buckets
+        self._buckets = DynamicArray([None] * new_capacity)
         self._capacity = new_capacity
+        self._size = 0
 
-        # reset size, will be updated during reinsertion
-        self._size = 0  
-
-        # rehash into new hashmap
         for i in range(old_buckets.length()):
-            if old_buckets[i] is not None and not old_buckets[i].is_tombstone:
-                self.put(old_buckets[i].key, old_buckets[i].value)
+            if old_buckets[i] is not None:
+                self._insert(old_buckets[i])
 
     def table_load(self) -> float:
         """
@@ -167,14 +1481,7 @@ class HashMap:
 
         :return: (int) number of empty buckets
         """
-        empty = 0
-
-        # iterate through hash table to count empty buckets
-        for i in range(self._capacity):
-            if self._buckets[i] is None or self._buckets[i].is_tombstone:
-                empty +=1
-
-        return empty
+        return self._capacity - self._size
 
     def get(self, key: str) -> object:
         """
@@ -184,22 +1491,9 @@ class HashMap:
 
         :return: value of key
         """
-        
-        # determine hashed index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
-
-        # quadratic probing to determine index
-        j = 0
-        new_index = index
-        while self._buckets[new_index] is not None:
-            if self._buckets[new_index].key == key and not self._buckets[new_index].is_tombstone:
-                # return value if non tombstone key found
-                return self._buckets[new_index].value
-            j += 1
-            new_index = (index + j ** 2) % self._capacity   
+        index = self._find(key, self._hash_function(key))
+        return self._buckets[index].value if index >= 0 else None
 
-        return None
     def contains_key(self, key: str) -> bool:
         """
         Determine if key exists in the hash map. Return true if it does, false otherwise.
@@ -208,97 +1502,59 @@ class HashMap:
 
         :return: (bool) true if present, false otherwise
         """
-        # false for empty hash map
         if self._size == 0:
             return False
-
-        # determine hashed index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
-
-        # quadratic probing to determine index
-        j = 0
-        new_index = index
-        while self._buckets[new_index] is not None:
-            if self._buckets[new_index].key == key and not self._buckets[new_index].is_tombstone:
-                # return true if non tombstone key located
-                return True
-            j += 1
-            new_index = (index + j ** 2) % self._capacity
-
-        return False
+        return self._find(key, self._hash_function(key)) >= 0
 
     def remove(self, key: str) -> None:
         """
         Remove given key and associated value from the has map. Does nothing if no such pair exists.
+        Entries after the removed one are shifted back until one is at its home slot.
 
         :param key: key to remove
         """
-        # determine hashed index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return
 
-        # quadratic probing to determine index
-        j = 0
-        new_index = index
-        while self._buckets[new_index] is not None:
-            if self._buckets[new_index].key == key and not self._buckets[new_index].is_tombstone:
-                # update tombstone status and reduce size
-                self._buckets[new_index].is_tombstone = True
-                self._size -= 1
-                return
-            j += 1
-            new_index = (index + j ** 2) % self._capacity  
+        # backward shift deletion, no tombstones are left behind
+        next_index = (index + 1) % self._capacity
+        while True:
+            entry = self._buckets[next_index]
+            if entry is None or self._distance(entry, next_index) == 0:
+                break
+            self._buckets[index] = entry
+            index, next_index = next_index, (next_index + 1) % self._capacity
 
-        return None
+        self._buckets[index] = None
+        self._size -= 1
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Return a dynamic array where each index contains a tuple of each key/value pair stored in the hash map.
 
-        :return: Dynamic array 
+        :return: Dynamic array
         """
-        # create new array
         new_array = DynamicArray()
-
-        # iterate through hash map to collect non-tombstone entries
         for i in range(self._capacity):
-            if self._buckets[i] is not None and not self._buckets[i].is_tombstone:
-                # append as a tuple (key, value)
+            if self._buckets[i] is not None:
                 new_array.append((self._buckets[i].key, self._buckets[i].value))
-
         return new_array
 
     def clear(self) -> None:
         """
         Clears contents of the hash map. Does not change capacity.
         """
-        # reinitialize buckets
-        self._buckets = DynamicArray()
-        for _ in range(self._capacity):
-            self._buckets.append(None)
-        # reset size
+        self._buckets = DynamicArray([None] * self._capacity)
         self._size = 0
 
     def __iter__(self):
         """
-        Create iterator for loop
+        Iterate over the entries in the table.
         """
-        self._index = 0
-        return self
-
-    def __next__(self):
-        """
-        Return the next item from the hash map.
-        """
-        # iterate
-        while self._index < self._capacity:
-            current_entry = self._buckets[self._index]
-            self._index += 1
-            # return next entry
-            if current_entry is not None and not current_entry.is_tombstone:
-                return current_entry
-        raise StopIteration
+        for i in range(self._capacity):
+            if self._buckets[i] is not None:
+                yield self._buckets[i]
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -509,3 +1765,15 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nupsert example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.upsert('key1', lambda value: value + 1, 0), m.upsert('key1', lambda value: value + 1, 0))
+    print(m.increment('key2', 5), m.setdefault('key2', 0), m.setdefault('key3', 'x'), m.get_size())
+    # a key whose fn raises is not left in the map
+    try:
+        m.upsert('key4', lambda value: value + 1)
+    except TypeError:
+        pass
+    print(m.contains_key('key4'), m.get_size())
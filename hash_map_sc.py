@@ -1,37 +1,91 @@
 # Description: Implementation of a hashmap with chaining.
 
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from a6_include import (BUCKET_POLICIES, TREEIFY_THRESHOLD, UNTREEIFY_THRESHOLD,
+                        DynamicArray, GenerationArray, LinkedList, SLNode,
+                        SortedBucket, bind_seed, dump_options, hash_function_1,
+                        hash_function_2, hash_keys, next_power_of_two,
+                        power_of_two_index, read_dump, write_dump)
+
+# current value passed to a compute function for a key that is not in the map
+_MISSING = object()
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1, *,
+                 power_of_two: bool = False,
+                 seed: int = None,
+                 bucket_policy: str = None,
+                 incremental_resize: bool = False,
+                 migration_batch: int = 4,
+                 shrink_load: float = None) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+
+        :param power_of_two: if True, capacities are powers of two and buckets are
+            picked by masking a mixed hash instead of taking it modulo a prime
+        :param seed: seed for the seeded hash functions in a6_include (fnv1a_hash,
+            siphash, mix_hash); a random seed is drawn for each map when omitted
+        :param bucket_policy: None, 'move_to_front' or 'transpose'; how a chain is
+            reorganized when a lookup finds a key in it, so hot keys end up near the head
+        :param incremental_resize: if True, growing the table keeps the old bucket array
+            alongside the new one and moves a few chains on every put/get/remove instead
+            of relinking everything at once
+        :param migration_batch: number of old buckets moved per operation while an
+            incremental resize is in progress
+        :param shrink_load: when set, e.g. 0.125, a remove that leaves the load below it
+            shrinks the table to a load of 0.5, never below the initial capacity; at
+            most 0.25, half that target, so a shrink leaves the load well clear of both
+            thresholds and the table does not resize back and forth
         """
-        self._buckets = DynamicArray()
+        if shrink_load is not None and not 0 < shrink_load <= 0.25:
+            raise ValueError("shrink_load must be greater than 0 and at most 0.25")
+        if bucket_policy is not None and bucket_policy not in BUCKET_POLICIES:
+            raise ValueError(f"unknown bucket policy {bucket_policy!r}")
+        self._bucket_policy = bucket_policy
+
+        # capacity must be a prime number, or a power of two in power_of_two mode
+        self._power_of_two = power_of_two
+        self._capacity = self._round_capacity(capacity)
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        # buckets stay None until the first insert into them, clear empties them in O(1)
+        self._buckets = GenerationArray([None] * self._capacity)
 
-        self._hash_function = function
+        # seeded hash functions get their own seed per map so collisions cannot be predicted
+        self._hash_function, self._seed = bind_seed(function, seed)
         self._size = 0
 
+        # lifetime resize counters reported by stats()
+        self._resizes = 0
+        self._resize_time = 0.0
+
+        # automatic shrinking on remove, down to the capacity the map started with
+        self._shrink_load = shrink_load
+        self._min_capacity = self._capacity
+
+        # old table is only kept while an incremental resize is in progress, buckets
+        # that have been moved to the new table are set to None in the old one
+        self._incremental_resize = incremental_resize
+        self._migration_batch = migration_batch
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
         out = ''
         for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+            bucket = self._buckets[i]
+            out += str(i) + ': ' + (str(bucket) if bucket is not None else 'SLL []') + '\n'
         return out
 
     def _next_prime(self, capacity: int) -> int:
@@ -81,6 +135,25 @@ class HashMap:
         """
         return self._capacity
 
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Return the capacity actually used for a requested capacity:
+        the next prime, or the next power of two in power_of_two mode.
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+    def _home(self, hash_value: int, capacity: int) -> int:
+        """
+        Return the bucket index for a hash in a table of the given capacity.
+        """
+        if self._power_of_two:
+            return power_of_two_index(hash_value, capacity)
+        return hash_value % capacity
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -90,26 +163,80 @@ class HashMap:
         :param key: key of the pair
         :param value: value of pair
         """
+        # hash once, the stored hash is reused on every later resize
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash_value: int, compute=None) -> SLNode:
+        """
+        Update or insert key/value pair whose hash is already known.
+
+        :param key: key of the pair
+        :param value: value of pair
+        :param hash_value: (int) full hash of the key
+        :param compute: function from the current value, _MISSING for a missing key,
+            to the value to store; used instead of value if given
+
+        :return: node of key
+        """
+        # move a few buckets if an incremental resize is in progress
+        if self._old_buckets is not None:
+            self._migrate(self._migration_batch)
+
         # determine if resizing necessary
         if self.table_load() >= 1.0:
-            self.resize_table(self._capacity * 2)
+            if self._incremental_resize:
+                self._start_migration(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity * 2)
 
-        # use has function to determine index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
+        # key may still live in the old table while migrating, update it in place
+        if self._old_buckets is not None:
+            bucket = self._old_bucket(hash_value)[1]
+            node = bucket.access(key, hash_value, self._bucket_policy) if bucket is not None else None
+            if node:
+                node.value = value if compute is None else compute(node.value)
+                return node
 
-        # retreive list at given index
-        bucket = self._buckets[index]
+        return self._insert(key, value, hash_value, compute)
+
+    def _insert(self, key: str, value: object, hash_value: int, compute=None) -> SLNode:
+        """
+        Update or insert key/value pair whose hash is already known, without checking the load.
+
+        :param key: key of the pair
+        :param value: value of pair
+        :param hash_value: (int) full hash of the key
+        :param compute: function from the current value, _MISSING for a missing key,
+            to the value to store; used instead of value if given
+
+        :return: node of key
+        """
+        index = self._home(hash_value, self._capacity)
 
         # check if key exists in the list
-        node = bucket.contains(key)
+        bucket = self._buckets[index]
+        node = bucket.access(key, hash_value, self._bucket_policy) if bucket is not None else None
         if node:
             # update value
-            node.value = value
-        else:
-            # insert new key-value pair
-            bucket.insert(key, value)
-            self._size += 1
+            node.value = value if compute is None else compute(node.value)
+            return node
+
+        # the new value is known before the map changes, so a failing compute leaves no key behind
+        if compute is not None:
+            value = compute(_MISSING)
+
+        # retreive list at given index, allocating it on first use
+        if bucket is None:
+            bucket = LinkedList()
+            self._buckets[index] = bucket
+
+        # insert new key-value pair
+        node = bucket.insert(key, value, hash_value)
+        self._size += 1
+        # long chains are searched by binary search instead of a linear scan
+        if bucket.length() > TREEIFY_THRESHOLD and isinstance(bucket, LinkedList):
+            self._buckets[index] = SortedBucket(bucket)
+        return node
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -120,33 +247,138 @@ class HashMap:
         if new_capacity < 1:
             return
 
-        # ensure new capcity is prime
-        if self._is_prime(new_capacity):
-            new_capacity = new_capacity
-        else:
-            new_capacity = self._next_prime(new_capacity)
+        # finish any incremental resize so all nodes are in one table
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        start = time.perf_counter()
+        self._rebuild(new_capacity)
+        self._resize_time += time.perf_counter() - start
+
+    def _rebuild(self, new_capacity: int) -> None:
+        """
+        Move every node into a new table of the given capacity, doubling it first
+        if the entries would not fit under the load limit. Keys are already unique
+        and carry their hash, so nodes are relinked as they are: no hashing, no
+        duplicate checks and no new nodes.
+
+        :param new_capacity: new capacity of the hash table
+        """
+        self._resizes += 1
 
-        # create new array 
-        new_buckets = DynamicArray()
-        for _ in range(new_capacity):
-            new_buckets.append(LinkedList())
+        # ensure new capcity is prime, or a power of two, and large enough for every entry
+        new_capacity = self._round_capacity(new_capacity)
+        while new_capacity < self._size:
+            new_capacity = self._round_capacity(new_capacity * 2)
 
-        # store old array of lists for rehashing
+        # store old array of lists for relinking
         old_buckets = self._buckets
         old_capacity = self._capacity
-        
-        # update to the new buckets and capacity
-        self._buckets = new_buckets
         self._capacity = new_capacity
-        # reset size, will be updated during reinsertion
-        self._size = 0  
 
-        # rehash all key-value pairs into the new buckets
+        # build the new chains in a plain list, buckets are allocated as nodes land in them
+        chains = [None] * new_capacity
+        long_chains = []
         for i in range(old_capacity):
             current_bucket = old_buckets[i]
+            if current_bucket is None:
+                continue
+            # the iterator has moved past a node before it is relinked
             for node in current_bucket:
-                self.put(node.key, node.value)
-    
+                index = self._home(node.hash_value, new_capacity)
+                chain = chains[index]
+                if chain is None:
+                    chain = chains[index] = LinkedList()
+                chain.push(node)
+                if chain.length() == TREEIFY_THRESHOLD + 1:
+                    long_chains.append(index)
+
+        # long chains are searched by binary search instead of a linear scan
+        for index in long_chains:
+            chains[index] = SortedBucket(chains[index])
+
+        self._buckets = GenerationArray(chains)
+
+    def _old_bucket(self, hash_value: int) -> tuple:
+        """
+        Return the index of a hash in the old table and the bucket stored there,
+        which is None once it has been migrated.
+
+        :param hash_value: (int) full hash of the key
+
+        :return: (tuple) index and bucket or None
+        """
+        index = self._home(hash_value, self._old_capacity)
+        return index, self._old_buckets[index]
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Begin an incremental resize. The current table becomes the old table and a new,
+        empty table is allocated; chains are moved over by _migrate.
+
+        :param new_capacity: new capacity of the hash table
+        """
+        # a previous migration must be done before the table can grow again
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        start = time.perf_counter()
+        self._resizes += 1
+
+        new_capacity = self._round_capacity(new_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+        # allocate in one step so starting the resize stays cheap
+        self._buckets = GenerationArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._resize_time += time.perf_counter() - start
+
+    def _migrate(self, count: int) -> None:
+        """
+        Relink the nodes of up to count buckets from the old table into the new one.
+        Drops the old table once every bucket has been moved.
+
+        :param count: maximum number of old buckets to move
+        """
+        start = time.perf_counter()
+        stop = min(self._migrate_index + count, self._old_capacity)
+        for i in range(self._migrate_index, stop):
+            bucket = self._old_buckets[i]
+            if bucket is None:
+                continue
+            self._old_buckets[i] = None
+            # the iterator has moved past a node before it is relinked
+            for node in bucket:
+                index = self._home(node.hash_value, self._capacity)
+                chain = self._buckets[index]
+                if chain is None:
+                    chain = self._buckets[index] = LinkedList()
+                chain.push(node)
+                if chain.length() > TREEIFY_THRESHOLD and isinstance(chain, LinkedList):
+                    self._buckets[index] = SortedBucket(chain)
+        self._migrate_index = stop
+
+        if self._migrate_index >= self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            self._migrate_index = 0
+        self._resize_time += time.perf_counter() - start
+
+    def migrate_step(self, count: int) -> bool:
+        """
+        Move up to count buckets of an incremental resize in progress to the new
+        table, so a caller can finish the resize in chunks of its own choosing.
+
+        :param count: maximum number of old buckets to move, 0 only reports
+
+        :return: (bool) True if buckets are still waiting to be moved
+        """
+        if self._old_buckets is not None:
+            self._migrate(count)
+        return self._old_buckets is not None
+
     def table_load(self) -> float:
         """
         Determine current hash table load factor.
@@ -165,7 +397,7 @@ class HashMap:
 
         # iterate through hash table to count empty buckets
         for i in range(self._capacity):
-            if self._buckets[i].length() == 0:
+            if self._buckets[i] is None or self._buckets[i].length() == 0:
                 empty += 1
 
         return empty
@@ -178,15 +410,12 @@ class HashMap:
 
         :return: value of key
         """
-        # determine index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
-
-        # retreive list at given index
-        bucket = self._buckets[index]
+        # move a few buckets if an incremental resize is in progress
+        if self._old_buckets is not None:
+            self._migrate(self._migration_batch)
 
-        # check if key exists in the list
-        node = bucket.contains(key)
+        # check if key exists in its list
+        node = self._lookup(key, self._hash_function(key))
         if node:
             # return value
             return node.value
@@ -206,15 +435,8 @@ class HashMap:
         if self._size == 0:
             return False
 
-        # determine hashed index
-        hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
-
-        # retreive list at given index
-        bucket = self._buckets[index]
-
-        # check if key exists in the list
-        node = bucket.contains(key)
+        # check if key exists in its list
+        node = self._lookup(key, self._hash_function(key))
         if node:
             return True
         else:
@@ -226,24 +448,82 @@ class HashMap:
 
         :param key: key to remove
         """
+        self._pop_node(key)
+
+    def _pop_node(self, key: str) -> SLNode:
+        """
+        Unlink key from its chain in a single pass and return its node, or None if the key is not in the map.
+
+        :param key: key to remove
+
+        :return: removed node or None
+        """
         if self._size == 0:
-            return
+            return None
+
+        # move a few buckets if an incremental resize is in progress
+        if self._old_buckets is not None:
+            self._migrate(self._migration_batch)
 
         # determine hashed index
         hash_value = self._hash_function(key)
-        index = hash_value % self._capacity
+        index = self._home(hash_value, self._capacity)
 
-        # retreive list at given index
+        # retreive list at given index, unlinking the node if key exists in the list
         bucket = self._buckets[index]
+        node = bucket.pop(key, hash_value) if bucket is not None else None
+
+        # key may not have been migrated yet
+        if node is None and self._old_buckets is not None:
+            index, bucket = self._old_bucket(hash_value)
+            node = bucket.pop(key, hash_value) if bucket is not None else None
+            if node:
+                self._size -= 1
+                if bucket.length() == 0:
+                    self._old_buckets[index] = None
+                self._shrink_if_sparse()
+            return node
 
-        # check if key exists in the list
-        node = bucket.contains(key)
         if node:
-            bucket.remove(key)
             # decrement size after removal
             self._size -= 1
+            # release the list once the bucket is empty again
+            if bucket.length() == 0:
+                self._buckets[index] = None
+            # short chains go back to a linked list
+            elif bucket.length() < UNTREEIFY_THRESHOLD and isinstance(bucket, SortedBucket):
+                self._buckets[index] = bucket.to_list()
+            self._shrink_if_sparse()
+        return node
+
+    def _shrink_if_sparse(self) -> bool:
+        """
+        Shrink the table if automatic shrinking is on and the load has fallen below
+        shrink_load. Return True if the table was resized. With incremental_resize the
+        entries are moved into the smaller table a few buckets per operation, and no
+        shrink starts while a resize is still in progress.
+        """
+        if self._shrink_load is None or self._size >= self._shrink_load * self._capacity:
+            return False
+        new_capacity = self._round_capacity(max(2 * self._size, self._min_capacity))
+        if new_capacity >= self._capacity:
+            return False
+        if self._incremental_resize:
+            if self._old_buckets is not None:
+                return False
+            self._start_migration(new_capacity)
         else:
-            return
+            self.resize_table(new_capacity)
+        return True
+
+    def shrink_to_fit(self) -> None:
+        """
+        Shrink the table to the smallest capacity that holds the entries at a load
+        of 0.5, half the load at which it grows. Does nothing if it is already that small.
+        """
+        new_capacity = self._round_capacity(max(2 * self._size, 1))
+        if new_capacity < self._capacity:
+            self.resize_table(new_capacity)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -258,25 +538,283 @@ class HashMap:
         for i in range(self._capacity):
             current_bucket = self._buckets[i]
             # if bucket contains items, iterate through and retrieve key-value pairs
-            if current_bucket.length() > 0:
+            if current_bucket is not None and current_bucket.length() > 0:
                 for node in current_bucket:
                     new_array.append((node.key, node.value))
             else:
                 continue
+
+        # include nodes that have not been migrated yet
+        if self._old_buckets is not None:
+            for i in range(self._migrate_index, self._old_capacity):
+                if self._old_buckets[i] is not None:
+                    for node in self._old_buckets[i]:
+                        new_array.append((node.key, node.value))
         return new_array
 
 
     def clear(self) -> None:
         """
-        Clears contents of the hash map. Does not change capacity.
+        Clears contents of the hash map in O(1). Does not change capacity.
         """
-        # reinitialize buckets
-        self._buckets = DynamicArray()
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        # start a new generation of buckets, the old lists read as None and are
+        # released as their buckets are written again
+        self._buckets.reset()
         # reset size
         self._size = 0
 
+        # drop any table still being migrated
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+    # ------------------------------------------------------------------ #
+
+    def upsert(self, key: str, fn, default: object = None) -> object:
+        """
+        Replace the value of key with fn(value) in a single pass over its chain. A
+        missing key is treated as holding default and is only inserted once fn returns.
+
+        :param key: key of the pair
+        :param fn: function from the current value to the new value
+        :param default: value fn receives when key is not in the map
+
+        :return: new value of key
+        """
+        return self._put_hashed(key, None, self._hash_function(key),
+                                lambda current: fn(default if current is _MISSING else current)).value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Return the value of key, inserting key with value default first if it is missing.
+
+        :param key: key to search for
+        :param default: value stored for a missing key
+
+        :return: value of key
+        """
+        return self._put_hashed(key, None, self._hash_function(key),
+                                lambda current: default if current is _MISSING else current).value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Add delta to the value of key, counting a missing key as 0.
+
+        :param key: key of the counter
+        :param delta: (int) amount to add
+
+        :return: (int) new value of key
+        """
+        return self._put_hashed(key, None, self._hash_function(key),
+                                lambda current: (0 if current is _MISSING else current) + delta).value
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Remove key and return its value, or default if the key is not in the map.
+
+        :param key: key to remove
+        :param default: value returned for a missing key
+
+        :return: removed value or default
+        """
+        node = self._pop_node(key)
+        return node.value if node is not None else default
+
+    def _lookup(self, key: str, hash_value: int) -> SLNode:
+        """
+        Return the node holding key in the current table or in the part of the old
+        table that has not been migrated yet, or None.
+
+        :param key: key to search for
+        :param hash_value: (int) full hash of the key
+
+        :return: node or None
+        """
+        bucket = self._buckets[self._home(hash_value, self._capacity)]
+        node = bucket.access(key, hash_value, self._bucket_policy) if bucket is not None else None
+
+        # key may not have been migrated yet
+        if node is None and self._old_buckets is not None:
+            bucket = self._old_bucket(hash_value)[1]
+            if bucket is not None:
+                node = bucket.access(key, hash_value, self._bucket_policy)
+        return node
+
+    @classmethod
+    def from_items(cls, items, expected_size: int = None,
+                   function: callable = hash_function_1, **options) -> "HashMap":
+        """
+        Build a new map from an iterable of (key, value) pairs. The table is sized
+        once for expected_size entries (the number of items by default) so it does
+        not grow while loading.
+
+        :param items: iterable of (key, value) tuples
+        :param expected_size: (int) number of entries the map should hold without resizing
+        :param function: hash function
+        :param options: other keyword arguments for HashMap
+
+        :return: new HashMap
+        """
+        items = list(items)
+        if expected_size is None:
+            expected_size = len(items)
+        m = cls(max(expected_size, 1), function, **options)
+        m.put_many(items)
+        return m
+
+    def put_many(self, items) -> None:
+        """
+        Put every (key, value) pair of an iterable. Keys are hashed in one batch and
+        the table is resized at most once, up front, for the final count.
+
+        :param items: iterable of (key, value) tuples
+        """
+        items = list(items)
+        hashes = hash_keys(self._hash_function, [key for key, _ in items])
+
+        # keys are inserted without checking the old table, finish any incremental resize
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        # size the table once, assuming every key is new
+        if self._size + len(items) > self._capacity:
+            self.resize_table(self._size + len(items))
+
+        for (key, value), hash_value in zip(items, hashes):
+            self._insert(key, value, hash_value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array with the value of every key, None for missing keys.
+
+        :param keys: iterable of keys
+
+        :return: Dynamic array of values in the order of keys
+        """
+        keys = list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            node = self._lookup(key, hash_value)
+            values.append(node.value if node else None)
+        return values
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array telling for every key whether it is in the map.
+
+        :param keys: iterable of keys
+
+        :return: Dynamic array of booleans in the order of keys
+        """
+        keys = list(keys)
+        found = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            found.append(self._lookup(key, hash_value) is not None)
+        return found
+
+    def dump(self, target) -> None:
+        """
+        Write the map in a compact binary format that load reads back without
+        rehashing: capacity, hash function id and seed, and every node with its
+        bucket index and stored hash, in chain order. The hash function must be one
+        of a6_include.HASH_FUNCTIONS.
+
+        :param target: file path or binary file object
+        """
+        # finish any incremental resize so all nodes are in one table
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        indexes, hashes, keys, values = [], [], [], []
+        for i in range(self._capacity):
+            bucket = self._buckets[i]
+            if bucket is not None:
+                for node in bucket:
+                    indexes.append(i)
+                    hashes.append(node.hash_value)
+                    keys.append(node.key)
+                    values.append(node.value)
+        write_dump(target, 'sc', self._hash_function, self._seed, self._capacity,
+                   self._power_of_two, indexes, hashes, keys, values)
+
+    @classmethod
+    def load(cls, source, **options) -> "HashMap":
+        """
+        Read a map written by dump. Nodes are linked straight into their buckets
+        with their stored hashes; no key is hashed again.
+
+        :param source: file path or binary file object
+        :param options: other keyword arguments for HashMap, e.g. bucket_policy
+
+        :return: new HashMap
+        """
+        dump = read_dump(source, 'sc')
+        m = cls(dump['capacity'], dump['function'], **dump_options(dump, options))
+
+        # push in reverse so every chain keeps the order it was dumped in
+        chains = [None] * m._capacity
+        indexes, hashes, keys, values = dump['indexes'], dump['hashes'], dump['keys'], dump['values']
+        for i in range(len(keys) - 1, -1, -1):
+            chain = chains[indexes[i]]
+            if chain is None:
+                chain = chains[indexes[i]] = LinkedList()
+            chain.push(SLNode(keys[i], values[i], None, hashes[i]))
+
+        # long chains are searched by binary search instead of a linear scan
+        for i in range(m._capacity):
+            if chains[i] is not None and chains[i].length() > TREEIFY_THRESHOLD:
+                chains[i] = SortedBucket(chains[i])
+
+        m._buckets = GenerationArray(chains)
+        m._size = len(keys)
+        return m
+
+    def stats(self, full: bool = True) -> dict:
+        """
+        Return statistics about the table. Size, capacity, load and the resize counters
+        are kept as the map changes and cost O(1); with full=True the chains are also
+        walked (O(capacity)) for the chain length histogram and expected lookup costs.
+
+        :param full: (bool) include the values that need a walk over the table
+
+        :return: (dict) with keys size, capacity, load, resizes, resize_time, migrating
+            and, when full (counted over the new table only during a resize), chain_lengths (chain length -> number of buckets), longest_chain,
+            sorted_buckets, expected_hit_probes and expected_miss_probes (nodes
+            visited per lookup, a binary search over n nodes visits n.bit_length())
+        """
+        stats = {'size': self._size,
+                 'capacity': self._capacity,
+                 'load': self.table_load(),
+                 'resizes': self._resizes,
+                 'resize_time': self._resize_time,
+                 'migrating': self._old_buckets is not None}
+        if not full:
+            return stats
+
+        chain_lengths = {}
+        sorted_buckets = 0
+        hit_visits = miss_visits = 0
+        for i in range(self._capacity):
+            bucket = self._buckets[i]
+            length = bucket.length() if bucket is not None else 0
+            chain_lengths[length] = chain_lengths.get(length, 0) + 1
+            if isinstance(bucket, SortedBucket):
+                sorted_buckets += 1
+                hit_visits += length * length.bit_length()
+                miss_visits += length.bit_length()
+            else:
+                # finding every node of a chain visits 1 + 2 + ... + length nodes,
+                # a miss walks the whole chain
+                hit_visits += length * (length + 1) // 2
+                miss_visits += length
+
+        stats['chain_lengths'] = dict(sorted(chain_lengths.items()))
+        stats['longest_chain'] = max(chain_lengths)
+        stats['sorted_buckets'] = sorted_buckets
+        stats['expected_hit_probes'] = hit_visits / self._size if self._size else 0.0
+        stats['expected_miss_probes'] = miss_visits / self._capacity
+        return stats
+
 
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     """
@@ -292,15 +830,10 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     mode = DynamicArray()
     max_frequency = 0
 
-    # populate hash with frequencies
+    # populate hash with frequencies, one pass over the chain per element
     for i in range(da.length()):
-        if map.contains_key(da[i]):
-            frequency = map.get(da[i]) + 1
-            map.put(da[i], frequency)
-        else:
-            frequency = 1
-            map.put(da[i], 1)
-    
+        frequency = map.increment(da[i])
+
         # update max_freq if needed
         if frequency > max_frequency:
                 max_frequency = frequency
@@ -313,8 +846,92 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
             mode.append(key)
     
     return (mode, max_frequency)
-        
-    
+
+
+def _count_chunk(values: list, partitions: int) -> list:
+    """
+    Count one chunk of find_mode_parallel's input in its own HashMap and split the
+    counts by partition, so every key of a partition is merged by the same worker.
+
+    :param values: list of values
+    :param partitions: (int) number of partitions
+
+    :return: list with a list of (key, count) tuples for every partition
+    """
+    counts = HashMap()
+    for value in values:
+        counts.increment(value)
+
+    parts = [[] for _ in range(partitions)]
+    pairs = counts.get_keys_and_values()
+    for i in range(pairs.length()):
+        key = pairs[i][0]
+        parts[zlib.crc32(key.encode('utf-8', 'surrogatepass')) % partitions].append(pairs[i])
+    return parts
+
+
+def _merge_partition(parts: list) -> tuple:
+    """
+    Add up the partial counts of one partition and return its modes.
+
+    :param parts: lists of (key, count) tuples, one from every chunk
+
+    :return: (tuple) list of the keys with the highest count in the partition, and that count
+    """
+    counts = HashMap()
+    max_frequency = 0
+    for part in parts:
+        for key, count in part:
+            frequency = counts.increment(key, count)
+            if frequency > max_frequency:
+                max_frequency = frequency
+
+    mode = []
+    pairs = counts.get_keys_and_values()
+    for i in range(pairs.length()):
+        key, frequency = pairs[i]
+        if frequency == max_frequency:
+            mode.append(key)
+    return mode, max_frequency
+
+
+def find_mode_parallel(da: DynamicArray, workers: int = None) -> tuple[DynamicArray, int]:
+    """
+    Find mode and number of occurrences like find_mode, counting on several processes.
+    The input is split into one chunk per worker and each chunk is counted into its own
+    HashMap. The partial counts are then partitioned by a hash of the key and every
+    partition is merged by one worker, so no single process merges all distinct keys.
+    Returns the same modes and frequency as find_mode; the order of the modes may differ.
+
+    :param da: dynamic array for mode search
+    :param workers: (int) number of worker processes, os.cpu_count() by default
+
+    :return: (tuple) a tuple with a dynamic array containing all modes and the
+            integer amount of occurrences
+    """
+    workers = workers or os.cpu_count() or 1
+    values = [da[i] for i in range(da.length())]
+    step = -(-len(values) // workers) or 1
+    chunks = [values[i:i + step] for i in range(0, len(values), step)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        counted = list(pool.map(_count_chunk, chunks, [workers] * len(chunks)))
+        merged = pool.map(_merge_partition, [[parts[p] for parts in counted] for p in range(workers)])
+
+        # keep the modes of the partitions whose maximum is the overall maximum
+        mode = DynamicArray()
+        max_frequency = 0
+        for keys, frequency in merged:
+            if frequency > max_frequency:
+                mode = DynamicArray()
+                max_frequency = frequency
+            if frequency == max_frequency and frequency > 0:
+                for key in keys:
+                    mode.append(key)
+
+    return (mode, max_frequency)
+
+
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -516,3 +1133,15 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nupsert example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.upsert('key1', lambda value: value + 1, 0), m.upsert('key1', lambda value: value + 1, 0))
+    print(m.increment('key2', 5), m.setdefault('key2', 0), m.setdefault('key3', 'x'), m.get_size())
+    # a key whose fn raises is not left in the map
+    try:
+        m.upsert('key4', lambda value: value + 1)
+    except TypeError:
+        pass
+    print(m.contains_key('key4'), m.get_size())
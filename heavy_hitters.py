@@ -0,0 +1,300 @@
+# Description: Streaming heavy hitters (top-k / mode) over iterators of any length.
+#
+# find_mode needs the whole input in a DynamicArray and an exact counter per distinct
+# value. The summaries here take items one at a time and answer top(k) at any point:
+#
+#   SpaceSaving     fixed number of counters, counts overestimated by at most epsilon * n
+#   CountMinSketch  fixed counter matrix, counts overestimated by at most epsilon * n
+#                   with probability 1 - delta
+#   ExactCounter    exact counts in a separate chaining HashMap, memory grows with the
+#                   number of distinct items
+
+import heapq
+import math
+from array import array
+
+import hash_map_sc
+from a6_include import (MASK_64, MIX_FINAL_1, MIX_FINAL_2, MIX_MULTIPLIER,
+                        DynamicArray, bind_seed, mix_hash)
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary (Metwally et al.). Keeps at most ceil(1 / epsilon) counters;
+    an unmonitored item takes over the smallest counter and inherits its count as
+    error. Every item that occurs more than epsilon * n times is always monitored.
+    """
+
+    def __init__(self, k: int, epsilon: float = 0.001) -> None:
+        """
+        Initialize an empty summary.
+
+        :param k: (int) default number of items reported by top
+        :param epsilon: (float) bound on the overestimate of a count, as a fraction of
+            the number of items seen; sets the number of counters
+        """
+        self._k = k
+        self._capacity = max(k, math.ceil(1 / epsilon))
+        self._counts = {}
+        self._errors = {}
+        # min-heap of (count, item); entries whose count is out of date are skipped
+        self._heap = []
+        self.total = 0
+
+    def add(self, item, count: int = 1) -> None:
+        """
+        Count count occurrences of item.
+
+        :param item: hashable, orderable item
+        :param count: (int) number of occurrences
+        """
+        self.total += count
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self._capacity:
+            counts[item] = count
+            self._errors[item] = 0
+        else:
+            # replace the item with the smallest counter
+            floor, victim = heapq.heappop(self._heap)
+            while counts.get(victim) != floor:
+                floor, victim = heapq.heappop(self._heap)
+            del counts[victim]
+            del self._errors[victim]
+            counts[item] = floor + count
+            self._errors[item] = floor
+        heapq.heappush(self._heap, (counts[item], item))
+
+        # drop out of date heap entries once they outnumber the live ones
+        if len(self._heap) > 4 * self._capacity:
+            self._heap = [(value, key) for key, value in counts.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, items) -> None:
+        """Count every item of an iterable."""
+        for item in items:
+            self.add(item)
+
+    def estimate(self, item) -> int:
+        """
+        Return the estimated count of item, never below its true count.
+        Unmonitored items are estimated at the smallest counter.
+        """
+        if item in self._counts:
+            return self._counts[item]
+        if len(self._counts) < self._capacity:
+            return 0
+        return min(self._counts.values())
+
+    def error(self, item) -> int:
+        """Return how much the estimate of a monitored item may exceed its true count."""
+        return self._errors.get(item, 0)
+
+    def top(self, k: int = None) -> DynamicArray:
+        """
+        Return a dynamic array of the k items with the largest counts as
+        (item, estimated count) tuples, largest first.
+        """
+        return _top(self._counts.items(), k or self._k)
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch (Cormode and Muthukrishnan). A depth x width matrix of counters;
+    an item adds to one counter per row and is estimated by the smallest of them.
+    The k items with the largest estimates seen so far are tracked as candidates.
+    Items must be strings, they are hashed with a seeded hash from a6_include.
+    """
+
+    def __init__(self, k: int, epsilon: float = 0.001, delta: float = 0.01,
+                 function: callable = mix_hash, seed: int = None) -> None:
+        """
+        Initialize an empty sketch.
+
+        :param k: (int) number of candidates kept for top
+        :param epsilon: (float) bound on the overestimate of a count, as a fraction of
+            the number of items seen; width is ceil(e / epsilon)
+        :param delta: (float) probability that an estimate exceeds the bound;
+            depth is ceil(ln(1 / delta))
+        :param function: 64-bit hash function
+        :param seed: seed for a seeded hash function, random when omitted
+        """
+        self._k = k
+        self._width = math.ceil(math.e / epsilon)
+        self._depth = math.ceil(math.log(1 / delta))
+        self._rows = [array('q', bytes(8 * self._width)) for _ in range(self._depth)]
+        self._hash_function, self._seed = bind_seed(function, seed)
+
+        # candidates for top with their estimate, and a min-heap over them
+        self._candidates = {}
+        self._heap = []
+        self.total = 0
+
+    def _columns(self, item: str) -> list:
+        """
+        Return the counter index of item in every row. The item is hashed once and
+        the hash is remixed per row with the MurmurHash3 finalizer, so two items share
+        a counter in every row only if their 64-bit hashes are equal. (Double hashing
+        would make them share all rows with probability 1 / width ** 2.)
+        """
+        hash_value = self._hash_function(item)
+        columns = []
+        for row in range(self._depth):
+            mixed = ((hash_value + row * MIX_MULTIPLIER) * MIX_FINAL_1) & MASK_64
+            mixed ^= mixed >> 33
+            mixed = (mixed * MIX_FINAL_2) & MASK_64
+            columns.append((mixed ^ (mixed >> 33)) % self._width)
+        return columns
+
+    def add(self, item: str, count: int = 1) -> None:
+        """
+        Count count occurrences of item.
+
+        :param item: (str) item
+        :param count: (int) number of occurrences
+        """
+        self.total += count
+        estimate = None
+        for row, column in zip(self._rows, self._columns(item)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+
+        candidates = self._candidates
+        if item not in candidates and len(candidates) >= self._k:
+            floor, victim = self._heap[0]
+            while candidates.get(victim) != floor:
+                heapq.heappop(self._heap)
+                floor, victim = self._heap[0]
+            if estimate <= floor:
+                return
+            heapq.heappop(self._heap)
+            del candidates[victim]
+        candidates[item] = estimate
+        heapq.heappush(self._heap, (estimate, item))
+
+        # drop out of date heap entries once they outnumber the live ones
+        if len(self._heap) > 4 * self._k:
+            self._heap = [(value, key) for key, value in candidates.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, items) -> None:
+        """Count every item of an iterable."""
+        for item in items:
+            self.add(item)
+
+    def estimate(self, item: str) -> int:
+        """Return the estimated count of item, never below its true count."""
+        return min(row[column] for row, column in zip(self._rows, self._columns(item)))
+
+    def top(self, k: int = None) -> DynamicArray:
+        """
+        Return a dynamic array of up to k candidates with the largest estimates as
+        (item, estimated count) tuples, largest first. k cannot exceed the number
+        of candidates the sketch was created with.
+        """
+        return _top(self._candidates.items(), min(k or self._k, self._k))
+
+
+class ExactCounter:
+    """
+    Exact counts of every distinct item in a separate chaining HashMap. Memory grows
+    with the number of distinct items; use it when that number is bounded.
+    """
+
+    def __init__(self, k: int, function: callable = mix_hash, **options) -> None:
+        """
+        Initialize an empty counter.
+
+        :param k: (int) default number of items reported by top
+        :param function: hash function for the HashMap
+        :param options: other keyword arguments for hash_map_sc.HashMap
+        """
+        self._k = k
+        self._map = hash_map_sc.HashMap(11, function, **options)
+        self.total = 0
+
+    def add(self, item: str, count: int = 1) -> None:
+        """
+        Count count occurrences of item.
+
+        :param item: (str) item
+        :param count: (int) number of occurrences
+        """
+        self.total += count
+        self._map.increment(item, count)
+
+    def update(self, items) -> None:
+        """Count every item of an iterable."""
+        for item in items:
+            self._map.increment(item)
+            self.total += 1
+
+    def estimate(self, item: str) -> int:
+        """Return the count of item."""
+        return self._map.get(item) or 0
+
+    def top(self, k: int = None) -> DynamicArray:
+        """
+        Return a dynamic array of the k items with the largest counts as
+        (item, count) tuples, largest first.
+        """
+        pairs = self._map.get_keys_and_values()
+        return _top((pairs[i] for i in range(pairs.length())), k or self._k)
+
+
+def _top(pairs, k: int) -> DynamicArray:
+    """Return the k (item, count) pairs with the largest counts as a dynamic array, largest first."""
+    top = DynamicArray()
+    for pair in heapq.nlargest(k, pairs, key=lambda pair: pair[1]):
+        top.append(pair)
+    return top
+
+
+# summaries available to stream_top_k
+SUMMARIES = {
+    'space_saving': SpaceSaving,
+    'count_min': CountMinSketch,
+    'exact': ExactCounter,
+}
+
+
+def stream_top_k(items, k: int, every: int = 10000, method: str = 'space_saving', **options):
+    """
+    Feed an iterable of any length into a heavy hitters summary and yield the
+    current top k, as returned by top, after every `every` items and once more
+    at the end of the stream.
+
+    :param items: iterable of items
+    :param k: (int) number of items reported
+    :param every: (int) number of items between reports
+    :param method: 'space_saving', 'count_min' or 'exact'
+    :param options: other keyword arguments for the summary, e.g. epsilon
+    """
+    summary = SUMMARIES[method](k, **options)
+    seen = 0
+    for item in items:
+        summary.add(item)
+        seen += 1
+        if seen % every == 0:
+            yield summary.top()
+    if seen % every:
+        yield summary.top()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    words = ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu", "Ubuntu", "Ubuntu"]
+    for method in SUMMARIES:
+        summary = SUMMARIES[method](2)
+        summary.update(words)
+        print(f"{method:<13} top: {summary.top()}, Mint: {summary.estimate('Mint')}")
+
+    print("\nstream_top_k, space saving with 3 counters")
+    print("------------------------------------------")
+    stream = (str(i % 7) if i % 3 else 'hot' for i in range(30))
+    for top in stream_top_k(stream, 3, every=10, epsilon=1 / 3):
+        print(top)